@@ -9,13 +9,15 @@ and provides a higher-level abstraction over the Codegen API.
 
 import os
 import time
+import asyncio
 import json
 import logging
 import re
 import random
 import requests
+from collections import Counter
 from typing import Dict, Any, Optional, List, Union, Callable, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 
 try:
@@ -23,9 +25,29 @@ try:
 except ImportError:
     Agent = None
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Whole-line '#' comments, removed before parsing JSON
+_COMMENT_LINE_RE = re.compile(r'^[ \t]*#.*\n?', re.MULTILINE)
+
+# JSON embedded in a markdown code block
+_JSON_CODE_BLOCK_RE = re.compile(r'```json\s*\n(.*?)\n\s*```', re.DOTALL)
+
+# Used to decode a JSON object in place, without slicing the surrounding text
+_JSON_DECODER = json.JSONDecoder()
+
+# Maximum prompt length in characters accepted by _validate_prompt
+MAX_PROMPT_LEN = 32000
+
+# Factor by which the polling interval grows while a task's status is unchanged
+_POLL_BACKOFF_FACTOR = 1.5
+
 class TaskStatus(str, Enum):
     """Enum representing possible task statuses."""
     PENDING = "pending"
@@ -42,16 +64,76 @@ class ReviewType(str, Enum):
     KORBIT = "korbit"
     IMPROVE = "improve"
 
-@dataclass
+# Prompt header shared by every review type, filled in with str.format_map
+_REVIEW_PROMPT_BASE = """
+        Please review the following pull request:
+        
+        Title: {title}
+        
+        Description:
+        {body}
+        
+        Changes:
+        {diff}
+        """
+
+# Full review prompt templates, built once per review type
+_REVIEW_PROMPT_TEMPLATES = {
+    ReviewType.STANDARD: _REVIEW_PROMPT_BASE + """
+            Perform a general code review focusing on:
+            1. Code correctness
+            2. Readability and maintainability
+            3. Adherence to best practices
+            4. Potential issues or bugs
+            
+            Format your review as a list of comments, with each comment on a separate line.
+            Lines starting with '#' will be ignored.
+            """,
+    ReviewType.GEMINI: _REVIEW_PROMPT_BASE + """
+            Perform a thorough code review focusing on:
+            1. Code correctness and potential bugs
+            2. Performance issues
+            3. Security vulnerabilities
+            4. Code style and best practices
+            5. Architecture and design patterns
+            
+            Format your review as a list of comments, with each comment on a separate line.
+            Lines starting with '#' will be ignored.
+            """,
+    ReviewType.KORBIT: _REVIEW_PROMPT_BASE + """
+            Perform a security-focused code review looking for:
+            1. Security vulnerabilities
+            2. Potential data leaks
+            3. Authentication/authorization issues
+            4. Input validation problems
+            5. Secure coding practices
+            
+            Format your review as a list of comments, with each comment on a separate line.
+            Lines starting with '#' will be ignored.
+            """,
+    ReviewType.IMPROVE: _REVIEW_PROMPT_BASE + """
+            Suggest improvements to the code focusing on:
+            1. Code quality and readability
+            2. Performance optimizations
+            3. Better design patterns
+            4. Reducing complexity
+            5. Enhancing maintainability
+            
+            Format your suggestions as a list of comments, with each comment on a separate line.
+            Lines starting with '#' will be ignored.
+            """,
+}
+
+@dataclass(frozen=True)
 class TaskResult:
-    """Represents the result of a Codegen task."""
+    """Represents the result of a Codegen task. Instances are immutable."""
     task_id: str
     status: TaskStatus
     result: Optional[Any] = None
     error: Optional[str] = None
     raw_response: Optional[Dict[str, Any]] = None
 
-class CircuitBreakerState(Enum):
+class CircuitBreakerState(str, Enum):
     """Enum representing the states of the circuit breaker."""
     CLOSED = "closed"  # Normal operation, requests are allowed
     OPEN = "open"      # Failure threshold exceeded, requests are blocked
@@ -68,7 +150,8 @@ class CircuitBreaker:
         self,
         failure_threshold: int = 5,
         recovery_timeout: float = 60.0,
-        name: str = "codegen-api"
+        name: str = "codegen-api",
+        clock: Callable[[], float] = time.time
     ):
         """
         Initialize the circuit breaker.
@@ -77,10 +160,12 @@ class CircuitBreaker:
             failure_threshold: Number of consecutive failures before opening the circuit
             recovery_timeout: Time in seconds to wait before trying to recover (half-open state)
             name: Name of this circuit breaker for logging
+            clock: Function returning the current time in seconds
         """
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.name = name
+        self.clock = clock
         self.state = CircuitBreakerState.CLOSED
         self.failure_count = 0
         self.last_failure_time = 0
@@ -92,7 +177,7 @@ class CircuitBreaker:
         Returns:
             True if the request should be allowed, False otherwise
         """
-        now = time.time()
+        now = self.clock()
         
         if self.state == CircuitBreakerState.CLOSED:
             return True
@@ -120,7 +205,7 @@ class CircuitBreaker:
             
     def record_failure(self) -> None:
         """Record a failed request and potentially open the circuit."""
-        self.last_failure_time = time.time()
+        self.last_failure_time = self.clock()
         
         if self.state == CircuitBreakerState.HALF_OPEN:
             logger.warning(f"Circuit {self.name} failed in HALF_OPEN state, returning to OPEN")
@@ -149,10 +234,17 @@ class CodegenClient:
         retry_delay: float = 2.0,
         polling_interval: float = 10.0,
         polling_timeout: float = 300.0,
+        max_poll_interval: float = 60.0,
         request_timeout: float = 30.0,
         auto_install: bool = True,
         circuit_breaker_threshold: int = 5,
-        circuit_breaker_recovery_time: float = 60.0
+        circuit_breaker_recovery_time: float = 60.0,
+        github_token: Optional[str] = None,
+        agent_factory: Optional[Callable[..., Any]] = None,
+        session: Optional[requests.Session] = None,
+        comment_delay: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
     ):
         """
         Initialize the Codegen client.
@@ -164,10 +256,17 @@ class CodegenClient:
             retry_delay: Initial delay between retries (will be exponentially increased).
             polling_interval: Interval in seconds between polling for task status.
             polling_timeout: Maximum time in seconds to wait for a task to complete.
+            max_poll_interval: Upper bound in seconds for the polling interval, which grows while a task's status is unchanged.
             request_timeout: Timeout in seconds for individual API requests.
             auto_install: Whether to automatically install the Codegen SDK if not found.
             circuit_breaker_threshold: Number of consecutive failures before opening the circuit.
             circuit_breaker_recovery_time: Time in seconds to wait before trying to recover.
+            github_token: GitHub token used for PR reviews and comments. If not provided, will try to get from GITHUB_TOKEN env var when needed.
+            agent_factory: Callable used to create the Codegen agent. Defaults to the SDK's Agent class.
+            session: HTTP session used for GitHub API calls. Defaults to a new requests.Session.
+            comment_delay: Delay in seconds between posting PR comments, to stay within GitHub's secondary rate limits.
+            clock: Monotonic clock used to time task polling.
+            sleep: Function used to wait between retries, polls and posted comments.
         """
         # Load configuration from environment variables if not provided
         self.api_key = api_key or os.environ.get("CODEGEN_TOKEN") or os.environ.get("CODEGEN_API_KEY")
@@ -176,7 +275,15 @@ class CodegenClient:
         self.retry_delay = float(os.environ.get("CODEGEN_RETRY_DELAY", retry_delay))
         self.polling_interval = float(os.environ.get("CODEGEN_POLLING_INTERVAL", polling_interval))
         self.polling_timeout = float(os.environ.get("CODEGEN_POLLING_TIMEOUT", polling_timeout))
+        self.max_poll_interval = float(os.environ.get("CODEGEN_MAX_POLL_INTERVAL", max_poll_interval))
         self.request_timeout = float(os.environ.get("CODEGEN_REQUEST_TIMEOUT", request_timeout))
+        self.comment_delay = float(os.environ.get("CODEGEN_COMMENT_DELAY", comment_delay))
+        self.github_token = github_token
+        self._clock = clock
+        self._sleep = sleep
+        
+        # Precompute the un-jittered backoff delay for each retry attempt
+        self._retry_delays = tuple(self.retry_delay * (2 ** attempt) for attempt in range(self.max_retries))
         
         if not self.api_key:
             raise ValueError("Codegen API key is required. Provide it as an argument or set the CODEGEN_TOKEN or CODEGEN_API_KEY environment variable.")
@@ -192,7 +299,7 @@ class CodegenClient:
         
         # Initialize the Codegen Agent
         global Agent
-        if Agent is None and auto_install:
+        if agent_factory is None and Agent is None and auto_install:
             logger.info("Codegen SDK not found. Installing...")
             try:
                 import subprocess
@@ -203,10 +310,15 @@ class CodegenClient:
                 logger.error(f"Failed to auto-install Codegen SDK: {e}")
                 raise ImportError(f"Failed to auto-install Codegen SDK: {e}. Please install it manually with 'pip install codegen'.")
         
-        if Agent is None:
-            raise ImportError("Failed to import Codegen SDK. Please install it manually with 'pip install codegen'.")
+        if agent_factory is None:
+            if Agent is None:
+                raise ImportError("Failed to import Codegen SDK. Please install it manually with 'pip install codegen'.")
+            agent_factory = Agent
         
-        self.agent = Agent(api_key=self.api_key, org_id=self.org_id)
+        self.agent = agent_factory(api_key=self.api_key, org_id=self.org_id)
+        
+        # Reuse connections across GitHub API calls
+        self._session = session if session is not None else requests.Session()
         logger.info(f"Initialized Codegen client with org_id={self.org_id[:4]}***")
     
     def _validate_prompt(self, prompt: str) -> None:
@@ -222,8 +334,8 @@ class CodegenClient:
         if not prompt:
             raise ValueError("Prompt cannot be empty")
         
-        if len(prompt) > 32000:  # Assuming a reasonable token limit
-            raise ValueError(f"Prompt is too long ({len(prompt)} characters). Maximum allowed is 32000 characters.")
+        if len(prompt) > MAX_PROMPT_LEN:  # Assuming a reasonable token limit
+            raise ValueError(f"Prompt is too long ({len(prompt)} characters). Maximum allowed is {MAX_PROMPT_LEN} characters.")
     
     def _calculate_retry_delay(self, attempt: int, jitter: bool = True) -> float:
         """
@@ -236,7 +348,10 @@ class CodegenClient:
         Returns:
             The delay in seconds before the next retry
         """
-        delay = self.retry_delay * (2 ** attempt)
+        if attempt < len(self._retry_delays):
+            delay = self._retry_delays[attempt]
+        else:
+            delay = self.retry_delay * (2 ** attempt)
         
         # Add jitter (random variation) to avoid all clients retrying at the same time
         if jitter:
@@ -244,31 +359,50 @@ class CodegenClient:
             
         return delay
     
-    def run_task(
-        self, 
-        prompt: str, 
-        wait_for_completion: bool = True,
-        callback: Optional[Callable[[TaskResult], None]] = None
-    ) -> TaskResult:
+    def _calculate_poll_delay(self, interval: float) -> float:
         """
-        Run a task with the Codegen API.
+        Calculate the delay before the next poll, with jitter.
         
         Args:
-            prompt: The prompt to send to the Codegen API.
-            wait_for_completion: Whether to wait for the task to complete.
-            callback: Optional callback function to call with task updates.
+            interval: The current polling interval
             
         Returns:
-            A TaskResult object containing the task status and result.
+            The delay in seconds before the next poll, at most max_poll_interval
         """
-        logger.info("Starting Codegen task")
+        # Vary the delay by up to 20% so concurrent pollers drift apart
+        return min(interval * (0.8 + 0.4 * random.random()), self.max_poll_interval)
+    
+    def _next_poll_interval(self, interval: float, status_changed: bool) -> float:
+        """
+        Calculate the polling interval to use after the current poll.
+        
+        Args:
+            interval: The current polling interval
+            status_changed: Whether the task's status changed on this poll
+            
+        Returns:
+            The base interval if the status changed, otherwise the grown interval
+        """
+        if status_changed:
+            return self.polling_interval
+        return min(interval * _POLL_BACKOFF_FACTOR, self.max_poll_interval)
+    
+    def _create_task(self, prompt: str) -> Tuple[Any, Optional[TaskResult]]:
+        """
+        Validate the prompt and create a Codegen task, retrying on errors.
         
+        Args:
+            prompt: The prompt to send to the Codegen API.
+            
+        Returns:
+            A tuple of (task, None) on success, or (None, failed TaskResult) on failure.
+        """
         # Validate the prompt
         try:
             self._validate_prompt(prompt)
         except ValueError as e:
             logger.error(f"Invalid prompt: {e}")
-            return TaskResult(
+            return None, TaskResult(
                 task_id="",
                 status=TaskStatus.FAILED,
                 error=str(e)
@@ -277,7 +411,7 @@ class CodegenClient:
         # Check if the circuit breaker allows the request
         if not self.circuit_breaker.allow_request():
             logger.error("Circuit breaker is open, request blocked")
-            return TaskResult(
+            return None, TaskResult(
                 task_id="",
                 status=TaskStatus.FAILED,
                 error="Service is currently unavailable due to repeated failures. Please try again later."
@@ -295,12 +429,12 @@ class CodegenClient:
                 if attempt < self.max_retries - 1:
                     delay = self._calculate_retry_delay(attempt)
                     logger.warning(f"Error running Codegen task (attempt {attempt+1}/{self.max_retries}): {e}. Retrying in {delay:.1f}s...")
-                    time.sleep(delay)
+                    self._sleep(delay)
                 else:
                     logger.error(f"Failed to run Codegen task after {self.max_retries} attempts: {e}")
                     # Record failure in the circuit breaker
                     self.circuit_breaker.record_failure()
-                    return TaskResult(
+                    return None, TaskResult(
                         task_id="",
                         status=TaskStatus.FAILED,
                         error=str(e)
@@ -309,12 +443,87 @@ class CodegenClient:
         if task is None:
             # Record failure in the circuit breaker
             self.circuit_breaker.record_failure()
-            return TaskResult(
+            return None, TaskResult(
                 task_id="",
                 status=TaskStatus.FAILED,
                 error="Failed to create task"
             )
         
+        return task, None
+    
+    def _update_result(
+        self,
+        task: Any,
+        result: TaskResult,
+        callback: Optional[Callable[[TaskResult], None]] = None
+    ) -> Tuple[TaskResult, bool]:
+        """
+        Update a task result from a freshly refreshed task.
+        
+        Args:
+            task: The refreshed Codegen task.
+            result: The current TaskResult.
+            callback: Optional callback function to call with task updates.
+            
+        Returns:
+            A tuple of (updated TaskResult, whether the task has finished).
+        """
+        # Update status
+        status_str = getattr(task, 'status', 'unknown')
+        try:
+            status = TaskStatus(status_str.lower())
+        except ValueError:
+            status = TaskStatus.UNKNOWN
+        result = replace(result, status=status)
+        
+        # Call callback if provided
+        if callback:
+            callback(result)
+        
+        # Check if task is complete
+        if status == TaskStatus.COMPLETED:
+            logger.info("Task completed successfully")
+            return replace(result, result=getattr(task, 'result', None)), True
+        elif status == TaskStatus.FAILED:
+            result = replace(result, error=getattr(task, 'error', 'Unknown error'))
+            logger.error(f"Task failed: {result.error}")
+            return result, True
+        
+        logger.info(f"Task status: {result.status}. Waiting...")
+        return result, False
+    
+    def _timeout_result(self, result: TaskResult) -> TaskResult:
+        """Mark a task result as failed because polling timed out."""
+        logger.error(f"Task timed out after {self.polling_timeout} seconds")
+        return replace(
+            result,
+            status=TaskStatus.FAILED,
+            error=f"Task timed out after {self.polling_timeout} seconds"
+        )
+    
+    def run_task(
+        self, 
+        prompt: str, 
+        wait_for_completion: bool = True,
+        callback: Optional[Callable[[TaskResult], None]] = None
+    ) -> TaskResult:
+        """
+        Run a task with the Codegen API.
+        
+        Args:
+            prompt: The prompt to send to the Codegen API.
+            wait_for_completion: Whether to wait for the task to complete.
+            callback: Optional callback function to call with task updates.
+            
+        Returns:
+            A TaskResult object containing the task status and result.
+        """
+        logger.info("Starting Codegen task")
+        
+        task, failure = self._create_task(prompt)
+        if failure is not None:
+            return failure
+        
         task_id = getattr(task, 'id', str(task))
         logger.info(f"Task created with ID: {task_id}")
         
@@ -330,45 +539,83 @@ class CodegenClient:
                 callback(result)
             return result
         
-        # Poll for task completion
-        start_time = time.time()
-        while time.time() - start_time < self.polling_timeout:
+        # Poll for task completion, backing off while the status stays the same
+        interval = self.polling_interval
+        start_time = self._clock()
+        while self._clock() - start_time < self.polling_timeout:
             try:
                 task.refresh()
-                
-                # Update status
-                status_str = getattr(task, 'status', 'unknown')
-                try:
-                    result.status = TaskStatus(status_str.lower())
-                except ValueError:
-                    result.status = TaskStatus.UNKNOWN
-                
-                # Call callback if provided
-                if callback:
-                    callback(result)
-                
-                # Check if task is complete
-                if result.status == TaskStatus.COMPLETED:
-                    result.result = getattr(task, 'result', None)
-                    logger.info("Task completed successfully")
+                previous_status = result.status
+                result, done = self._update_result(task, result, callback)
+                if done:
                     return result
-                elif result.status == TaskStatus.FAILED:
-                    result.error = getattr(task, 'error', 'Unknown error')
-                    logger.error(f"Task failed: {result.error}")
+                interval = self._next_poll_interval(interval, result.status != previous_status)
+            except Exception as e:
+                logger.warning(f"Error checking task status: {e}")
+            delay = self._calculate_poll_delay(interval)
+            if delay > 0:
+                self._sleep(delay)
+        
+        return self._timeout_result(result)
+    
+    async def arun_task(
+        self, 
+        prompt: str, 
+        wait_for_completion: bool = True,
+        callback: Optional[Callable[[TaskResult], None]] = None
+    ) -> TaskResult:
+        """
+        Run a task with the Codegen API without blocking the event loop.
+        
+        The blocking SDK calls run in the default executor and polling waits
+        with asyncio.sleep, so many tasks can be awaited concurrently.
+        
+        Args:
+            prompt: The prompt to send to the Codegen API.
+            wait_for_completion: Whether to wait for the task to complete.
+            callback: Optional callback function to call with task updates.
+            
+        Returns:
+            A TaskResult object containing the task status and result.
+        """
+        logger.info("Starting Codegen task")
+        loop = asyncio.get_running_loop()
+        
+        task, failure = await loop.run_in_executor(None, self._create_task, prompt)
+        if failure is not None:
+            return failure
+        
+        task_id = getattr(task, 'id', str(task))
+        logger.info(f"Task created with ID: {task_id}")
+        
+        # Create initial task result
+        result = TaskResult(
+            task_id=task_id,
+            status=TaskStatus.PENDING
+        )
+        
+        # If not waiting for completion, return immediately
+        if not wait_for_completion:
+            if callback:
+                callback(result)
+            return result
+        
+        # Poll for task completion, backing off while the status stays the same
+        interval = self.polling_interval
+        start_time = self._clock()
+        while self._clock() - start_time < self.polling_timeout:
+            try:
+                await loop.run_in_executor(None, task.refresh)
+                previous_status = result.status
+                result, done = self._update_result(task, result, callback)
+                if done:
                     return result
-                
-                # Log status and wait
-                logger.info(f"Task status: {result.status}. Waiting...")
-                time.sleep(self.polling_interval)
+                interval = self._next_poll_interval(interval, result.status != previous_status)
             except Exception as e:
                 logger.warning(f"Error checking task status: {e}")
-                time.sleep(self.polling_interval)
+            await asyncio.sleep(self._calculate_poll_delay(interval))
         
-        # Timeout
-        logger.error(f"Task timed out after {self.polling_timeout} seconds")
-        result.status = TaskStatus.FAILED
-        result.error = f"Task timed out after {self.polling_timeout} seconds"
-        return result
+        return self._timeout_result(result)
     
     def parse_json_result(self, result: TaskResult) -> Dict[str, Any]:
         """
@@ -388,29 +635,32 @@ class CodegenClient:
         
         # Store the raw result for debugging
         raw_result = result.result
+        if isinstance(raw_result, bytes):
+            raw_result = raw_result.decode('utf-8')
         
         # Filter out lines starting with '#'
-        filtered_result = '\n'.join([line for line in raw_result.split('\n') if not line.strip().startswith('#')])
+        filtered_result = _COMMENT_LINE_RE.sub('', raw_result)
         
         # Try to extract JSON from markdown code blocks
-        json_match = re.search(r'```json\s*\n(.*?)\n\s*```', filtered_result, re.DOTALL)
+        json_match = _JSON_CODE_BLOCK_RE.search(filtered_result)
         if json_match:
             try:
-                return json.loads(json_match.group(1))
+                return _json_loads(json_match.group(1))
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to parse JSON from code block: {e}")
         
-        # Try to find any JSON object in the result
-        json_match = re.search(r'({.*})', filtered_result, re.DOTALL)
-        if json_match:
+        # Try to decode a JSON object starting at each opening brace in turn
+        start = filtered_result.find('{')
+        while start != -1:
             try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse JSON from matched object: {e}")
+                obj, _ = _JSON_DECODER.raw_decode(filtered_result, start)
+                return obj
+            except json.JSONDecodeError:
+                start = filtered_result.find('{', start + 1)
         
         # Last resort: try to parse the whole result as JSON
         try:
-            return json.loads(filtered_result)
+            return _json_loads(filtered_result)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON from result: {e}")
             # Include more context in the error message for better debugging
@@ -456,72 +706,13 @@ class CodegenClient:
         """
         options = options or {}
         
-        # Extract PR details
-        pr_title = pr_data.get("title", "")
-        pr_description = pr_data.get("body", "")
-        pr_diff = pr_data.get("diff", "")
-        
-        # Base prompt for all review types
-        base_prompt = f"""
-        Please review the following pull request:
-        
-        Title: {pr_title}
-        
-        Description:
-        {pr_description}
-        
-        Changes:
-        {pr_diff}
-        """
-        
-        # Add specific instructions based on review type
-        if review_type == ReviewType.GEMINI:
-            return base_prompt + """
-            Perform a thorough code review focusing on:
-            1. Code correctness and potential bugs
-            2. Performance issues
-            3. Security vulnerabilities
-            4. Code style and best practices
-            5. Architecture and design patterns
-            
-            Format your review as a list of comments, with each comment on a separate line.
-            Lines starting with '#' will be ignored.
-            """
-        elif review_type == ReviewType.KORBIT:
-            return base_prompt + """
-            Perform a security-focused code review looking for:
-            1. Security vulnerabilities
-            2. Potential data leaks
-            3. Authentication/authorization issues
-            4. Input validation problems
-            5. Secure coding practices
-            
-            Format your review as a list of comments, with each comment on a separate line.
-            Lines starting with '#' will be ignored.
-            """
-        elif review_type == ReviewType.IMPROVE:
-            return base_prompt + """
-            Suggest improvements to the code focusing on:
-            1. Code quality and readability
-            2. Performance optimizations
-            3. Better design patterns
-            4. Reducing complexity
-            5. Enhancing maintainability
-            
-            Format your suggestions as a list of comments, with each comment on a separate line.
-            Lines starting with '#' will be ignored.
-            """
-        else:  # ReviewType.STANDARD
-            return base_prompt + """
-            Perform a general code review focusing on:
-            1. Code correctness
-            2. Readability and maintainability
-            3. Adherence to best practices
-            4. Potential issues or bugs
-            
-            Format your review as a list of comments, with each comment on a separate line.
-            Lines starting with '#' will be ignored.
-            """
+        # Fill in the prebuilt template for this review type
+        template = _REVIEW_PROMPT_TEMPLATES.get(review_type, _REVIEW_PROMPT_TEMPLATES[ReviewType.STANDARD])
+        return template.format_map({
+            "title": pr_data.get("title", ""),
+            "body": pr_data.get("body", ""),
+            "diff": pr_data.get("diff", "")
+        })
     
     def review_pull_request(self,
                            repo_owner: str,
@@ -538,13 +729,13 @@ class CodegenClient:
             repo_name: GitHub repository name
             pr_number: Pull request number
             review_command: The review command (e.g., "/review", "/gemini-review")
-            github_token: GitHub token for authentication. If not provided, will try to get from GITHUB_TOKEN env var.
+            github_token: GitHub token for authentication. If not provided, uses the client's github_token or the GITHUB_TOKEN env var.
             wait_for_completion: Whether to wait for the review to complete
             
         Returns:
             Dictionary with results of the review operation
         """
-        token = github_token or os.environ.get("GITHUB_TOKEN")
+        token = github_token or self.github_token or os.environ.get("GITHUB_TOKEN")
         if not token:
             raise ValueError("GitHub token is required. Provide it as an argument or set the GITHUB_TOKEN environment variable.")
         
@@ -559,13 +750,13 @@ class CodegenClient:
                 "Accept": "application/vnd.github.v3+json"
             }
             
-            response = requests.get(url, headers=headers, timeout=self.request_timeout)
+            response = self._session.get(url, headers=headers, timeout=self.request_timeout)
             response.raise_for_status()
             pr_data = response.json()
             
             # Fetch PR diff
             diff_url = f"{url}.diff"
-            diff_response = requests.get(diff_url, headers=headers, timeout=self.request_timeout)
+            diff_response = self._session.get(diff_url, headers=headers, timeout=self.request_timeout)
             diff_response.raise_for_status()
             pr_data["diff"] = diff_response.text
             
@@ -629,12 +820,12 @@ class CodegenClient:
             repo_name: GitHub repository name
             pr_number: Pull request number
             comments: List of comments to post (one comment per line)
-            github_token: GitHub token for authentication. If not provided, will try to get from GITHUB_TOKEN env var.
+            github_token: GitHub token for authentication. If not provided, uses the client's github_token or the GITHUB_TOKEN env var.
             
         Returns:
             Dictionary with results of the comment posting operation
         """
-        token = github_token or os.environ.get("GITHUB_TOKEN")
+        token = github_token or self.github_token or os.environ.get("GITHUB_TOKEN")
         if not token:
             raise ValueError("GitHub token is required. Provide it as an argument or set the GITHUB_TOKEN environment variable.")
         
@@ -645,47 +836,62 @@ class CodegenClient:
             logger.warning("No valid comments to post after filtering")
             return {"status": "skipped", "reason": "No valid comments to post"}
         
+        url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/issues/{pr_number}/comments"
+        headers = {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        
+        # Post the comments one at a time over the shared session; GitHub asks for
+        # content-creating requests to be serialized with a delay between them
         results = []
-        for comment in filtered_comments:
-            try:
-                # Post the comment to the PR
-                url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/issues/{pr_number}/comments"
-                headers = {
-                    "Authorization": f"token {token}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-                data = {"body": comment}
-                
-                response = requests.post(url, headers=headers, json=data, timeout=self.request_timeout)
-                response.raise_for_status()
-                
-                results.append({
-                    "status": "success",
-                    "comment_id": response.json().get("id"),
-                    "comment": comment
-                })
-                
-                logger.info(f"Posted comment to PR #{pr_number}: {comment[:50]}...")
-                
-                # Add a small delay to avoid rate limiting
-                time.sleep(1)
-                
-            except requests.RequestException as e:
-                logger.error(f"Failed to post comment to PR #{pr_number}: {e}")
-                results.append({
-                    "status": "error",
-                    "error": str(e),
-                    "comment": comment
-                })
+        for index, comment in enumerate(filtered_comments):
+            if index:
+                self._sleep(self.comment_delay)
+            results.append(self._post_pr_comment(url, headers, pr_number, comment))
+        
+        # Tally the outcomes in a single pass over the results
+        status_counts = Counter(r["status"] for r in results)
         
         return {
             "status": "completed",
             "total_comments": len(filtered_comments),
-            "successful_comments": sum(1 for r in results if r["status"] == "success"),
-            "failed_comments": sum(1 for r in results if r["status"] == "error"),
+            "successful_comments": status_counts["success"],
+            "failed_comments": status_counts["error"],
             "results": results
         }
     
+    def _post_pr_comment(self, url: str, headers: Dict[str, str], pr_number: int, comment: str) -> Dict[str, Any]:
+        """
+        Post a single comment to a GitHub pull request.
+        
+        Args:
+            url: The PR comments API URL
+            headers: Request headers, including authentication
+            pr_number: Pull request number (for logging)
+            comment: The comment body
+            
+        Returns:
+            Dictionary with the result of posting the comment
+        """
+        try:
+            response = self._session.post(url, headers=headers, json={"body": comment}, timeout=self.request_timeout)
+            response.raise_for_status()
+            
+            logger.info(f"Posted comment to PR #{pr_number}: {comment[:50]}...")
+            return {
+                "status": "success",
+                "comment_id": response.json().get("id"),
+                "comment": comment
+            }
+        except requests.RequestException as e:
+            logger.error(f"Failed to post comment to PR #{pr_number}: {e}")
+            return {
+                "status": "error",
+                "error": str(e),
+                "comment": comment
+            }
+    
     def parse_and_post_pr_comments(
         self,
         result: TaskResult,
@@ -705,7 +911,7 @@ class CodegenClient:
             repo_owner: GitHub repository owner (username or organization)
             repo_name: GitHub repository name
             pr_number: Pull request number
-            github_token: GitHub token for authentication. If not provided, will try to get from GITHUB_TOKEN env var.
+            github_token: GitHub token for authentication. If not provided, uses the client's github_token or the GITHUB_TOKEN env var.
             
         Returns:
             Dictionary with results of the comment posting operation
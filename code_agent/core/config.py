@@ -14,14 +14,39 @@ Configuration can be loaded from:
 """
 
 import os
+import copy
 import json
 import argparse
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+from code_agent.core.json_utils import dumps_indented
+
+# Environment variables read by CodeAgentConfig
+_ENV_KEYS = ("CODEGEN_TOKEN", "CODEGEN_ORG_ID", "GITHUB_TOKEN", "GITHUB_REPOSITORY", "NGROK_TOKEN")
+
+# Values of the _ENV_KEYS that are set, captured on first use. Code that changes
+# these variables after that (such as loading a .env file) must call reset_env_cache()
+_env_snapshot: Optional[Dict[str, str]] = None
+
+def _get_env_snapshot() -> Dict[str, str]:
+    """Get the snapshot of configuration environment variables, taking it if needed."""
+    global _env_snapshot
+    if _env_snapshot is None:
+        _env_snapshot = {key: os.environ[key] for key in _ENV_KEYS if key in os.environ}
+    return _env_snapshot
+
+def reset_env_cache():
+    """Discard the environment snapshot so the next configuration load re-reads os.environ."""
+    global _env_snapshot
+    _env_snapshot = None
 
 class CodeAgentConfig:
     """Manages configuration for all Code Agent components."""
     
+    # Parsed configuration files, keyed by (absolute path, modification time)
+    _FILE_CACHE: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    
     def __init__(self):
         """Initialize the configuration with default values."""
         # Core CodeGen settings
@@ -48,24 +73,35 @@ class CodeAgentConfig:
     
     def _load_from_env(self):
         """Load configuration from environment variables."""
+        env = _get_env_snapshot()
+        
         # CodeGen settings
-        self.codegen_token = os.environ.get("CODEGEN_TOKEN", self.codegen_token)
-        self.codegen_org_id = os.environ.get("CODEGEN_ORG_ID", self.codegen_org_id)
+        self.codegen_token = env.get("CODEGEN_TOKEN", self.codegen_token)
+        self.codegen_org_id = env.get("CODEGEN_ORG_ID", self.codegen_org_id)
         
         # GitHub settings
-        self.github_token = os.environ.get("GITHUB_TOKEN", self.github_token)
-        self.repo_name = os.environ.get("GITHUB_REPOSITORY", self.repo_name)
+        self.github_token = env.get("GITHUB_TOKEN", self.github_token)
+        self.repo_name = env.get("GITHUB_REPOSITORY", self.repo_name)
         
         # Webhook and ngrok settings
-        self.ngrok_token = os.environ.get("NGROK_TOKEN", self.ngrok_token)
+        self.ngrok_token = env.get("NGROK_TOKEN", self.ngrok_token)
     
     def _load_from_file(self, config_path: str = "code_agent_config.json"):
         """Load configuration from a JSON file."""
         try:
             config_file = Path(config_path)
             if config_file.exists():
-                with open(config_file, 'r') as f:
-                    config_data = json.load(f)
+                # Only re-read the file if it changed since it was last parsed
+                cache_key = (os.path.abspath(config_path), config_file.stat().st_mtime_ns)
+                config_data = self._FILE_CACHE.get(cache_key)
+                if config_data is None:
+                    with open(config_file, 'r') as f:
+                        config_data = json.load(f)
+                    self._FILE_CACHE[cache_key] = config_data
+                
+                # Give each instance its own copy, so changes to nested values
+                # don't leak into the cache or other instances
+                config_data = copy.deepcopy(config_data)
                 
                 # Update attributes from config file
                 for key, value in config_data.items():
@@ -84,11 +120,10 @@ class CodeAgentConfig:
     def save_to_file(self, config_path: str = "code_agent_config.json"):
         """Save current configuration to a JSON file."""
         try:
-            config_data = {key: value for key, value in self.__dict__.items() 
-                          if not key.startswith('_')}
+            config_data = self.get_as_dict()
             
-            with open(config_path, 'w') as f:
-                json.dump(config_data, f, indent=2)
+            with open(config_path, 'wb') as f:
+                f.write(dumps_indented(config_data))
             
             print(f"Configuration saved to {config_path}")
             return True
@@ -111,8 +146,7 @@ class CodeAgentConfig:
     
     def get_as_dict(self) -> Dict[str, Any]:
         """Get the configuration as a dictionary."""
-        return {key: value for key, value in self.__dict__.items() 
-                if not key.startswith('_')}
+        return {key: value for key, value in vars(self).items() if not key.startswith('_')}
 
 # Singleton instance for easy access across modules
 config = CodeAgentConfig()
@@ -123,5 +157,8 @@ def get_config() -> CodeAgentConfig:
 
 def init_config_from_args(args: argparse.Namespace) -> CodeAgentConfig:
     """Initialize configuration from command line arguments."""
+    # Re-read the environment, which may have changed since the singleton was created
+    reset_env_cache()
+    config._load_from_env()
     config.update_from_args(args)
     return config
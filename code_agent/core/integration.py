@@ -12,51 +12,91 @@ It enables shared context and data passing between components.
 """
 
 import os
+import re
+import copy
 import json
+import functools
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
-def extract_context_for_issue_solving(context_file: str, issue_number: int) -> Dict[str, Any]:
-    """Extract relevant context from a context file for issue solving."""
-    try:
-        with open(context_file, 'r') as f:
-            context_data = json.load(f)
+from code_agent.core.json_utils import dumps_indented
+
+@functools.lru_cache(maxsize=16)
+def _load_context(context_file: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a context file. Cached per path and modification time; callers must not mutate the result."""
+    with open(context_file, 'r') as f:
+        return json.load(f)
+
+def _index_issues(context_data: Dict[str, Any]) -> Dict[Any, Dict[str, Any]]:
+    """Map issue numbers to issues, keeping the first issue for each number."""
+    issues_by_number = {}
+    for issue in context_data.get('issues', []):
+        issues_by_number.setdefault(issue.get('number'), issue)
+    return issues_by_number
+
+@functools.lru_cache(maxsize=16)
+def _load_issue_index(context_file: str, mtime_ns: int) -> Dict[Any, Dict[str, Any]]:
+    """Index the issues of a context file by number. Cached like _load_context."""
+    return _index_issues(_load_context(context_file, mtime_ns))
+
+def _context_key(context_file: str) -> Tuple[str, int]:
+    """Get the cache key for a context file: its absolute path and modification time."""
+    context_file = os.path.abspath(context_file)
+    return context_file, os.stat(context_file).st_mtime_ns
+
+def load_context(context_file: str) -> Dict[str, Any]:
+    """Load a context file, reusing the parsed data while the file is unchanged."""
+    # Return a copy, so callers can't change the cached data
+    return copy.deepcopy(_load_context(*_context_key(context_file)))
+
+def _extract_from_dict(
+    context_data: Dict[str, Any],
+    issue_number: int,
+    issues_by_number: Optional[Dict[Any, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Extract relevant context for issue solving from already-parsed context data."""
+    # Find the specific issue in the context
+    if issues_by_number is None:
+        issues_by_number = _index_issues(context_data)
+    issue_data = issues_by_number.get(issue_number)
+    
+    # Extract code snippets from relevant files based on issue context
+    code_snippets = []
+    if issue_data and context_data.get('files'):
+        # Extract keywords from issue (simplified version)
+        keywords = []
+        if issue_data.get('title'):
+            keywords.extend(issue_data['title'].split())
+        if issue_data.get('body'):
+            keywords.extend(issue_data['body'].split())
         
-        # Find the specific issue in the context
-        issue_data = None
-        for issue in context_data.get('issues', []):
-            if issue.get('number') == issue_number:
-                issue_data = issue
-                break
+        # Filter keywords to be more specific (remove common words)
+        keywords = {k.lower() for k in keywords if len(k) > 3}
         
-        # Extract code snippets from relevant files based on issue context
-        code_snippets = []
-        if issue_data and context_data.get('files'):
-            # Extract keywords from issue (simplified version)
-            keywords = []
-            if issue_data.get('title'):
-                keywords.extend(issue_data['title'].split())
-            if issue_data.get('body'):
-                keywords.extend(issue_data['body'].split())
-            
-            # Filter keywords to be more specific (remove common words)
-            keywords = [k.lower() for k in keywords if len(k) > 3]
-            
-            # Find relevant files based on keywords
+        # Find relevant files based on keywords, matching all of them in one regex pass per file
+        if keywords:
+            keyword_pattern = re.compile('|'.join(map(re.escape, keywords)))
             for file_path, file_info in context_data.get('files', {}).items():
                 content = file_info.get('content', '')
-                if any(kw in content.lower() for kw in keywords):
+                if keyword_pattern.search(content.lower()):
                     code_snippets.append({
                         'file': file_path,
                         'content': content
                     })
-        
-        return {
-            'repository': context_data.get('repository', ''),
-            'issue': issue_data or {},
-            'code_snippets': code_snippets[:5],  # Limit to 5 most relevant files
-            'error_logs': context_data.get('error_logs', [])
-        }
+    
+    # Copy the issue and error logs, which may come from cached context data
+    return {
+        'repository': context_data.get('repository', ''),
+        'issue': copy.deepcopy(issue_data) if issue_data else {},
+        'code_snippets': code_snippets[:5],  # Limit to 5 most relevant files
+        'error_logs': copy.deepcopy(context_data.get('error_logs', []))
+    }
+
+def extract_context_for_issue_solving(context_file: str, issue_number: int) -> Dict[str, Any]:
+    """Extract relevant context from a context file for issue solving."""
+    try:
+        cache_key = _context_key(context_file)
+        return _extract_from_dict(_load_context(*cache_key), issue_number, _load_issue_index(*cache_key))
     except Exception as e:
         print(f"Error extracting context for issue solving: {str(e)}")
         return {
@@ -80,8 +120,8 @@ def prepare_workflow_from_issue_solution(task_id: str, context_file: str) -> Dic
         
         # Save the workflow context to a file
         workflow_file = f"workflow_context_{task_id}.json"
-        with open(workflow_file, 'w') as f:
-            json.dump(workflow_context, f, indent=2)
+        with open(workflow_file, 'wb') as f:
+            f.write(dumps_indented(workflow_context))
         
         return workflow_context
     except Exception as e:
@@ -92,30 +132,35 @@ def prepare_workflow_from_issue_solution(task_id: str, context_file: str) -> Dic
             'error': str(e)
         }
 
+def _requirements_from_dict(context_data: Dict[str, Any]) -> str:
+    """Build the REQUIREMENTS.md content from already-parsed context data."""
+    # Extract issues and generate requirements
+    issues = context_data.get('issues', [])
+    
+    # Collect the lines and join them once at the end
+    parts = ["# Project Requirements\n\n"]
+    
+    if issues:
+        parts.append("## Issues to Resolve\n\n")
+        for issue in issues:
+            title = issue.get('title', 'Unknown Issue')
+            number = issue.get('number', '???')
+            parts.append(f"- [ ] #{number}: {title}\n")
+    
+    # Add other sections based on repository analysis
+    if context_data.get('codebase', {}).get('entry_points'):
+        parts.append("\n## Code Structure\n\n")
+        parts.append("Entry points:\n")
+        for entry in context_data['codebase']['entry_points']:
+            parts.append(f"- {entry}\n")
+    
+    return "".join(parts)
+
 def generate_requirements_from_context(context_file: str) -> str:
     """Generate a REQUIREMENTS.md file based on context."""
     try:
-        with open(context_file, 'r') as f:
-            context_data = json.load(f)
-        
-        # Extract issues and generate requirements
-        issues = context_data.get('issues', [])
-        
-        requirements = "# Project Requirements\n\n"
-        
-        if issues:
-            requirements += "## Issues to Resolve\n\n"
-            for issue in issues:
-                title = issue.get('title', 'Unknown Issue')
-                number = issue.get('number', '???')
-                requirements += f"- [ ] #{number}: {title}\n"
-        
-        # Add other sections based on repository analysis
-        if context_data.get('codebase', {}).get('entry_points'):
-            requirements += "\n## Code Structure\n\n"
-            requirements += "Entry points:\n"
-            for entry in context_data['codebase']['entry_points']:
-                requirements += f"- {entry}\n"
+        # The requirements only read the context, so the cached data can be used as is
+        requirements = _requirements_from_dict(_load_context(*_context_key(context_file)))
         
         # Save the requirements file
         with open("REQUIREMENTS.md", 'w') as f:
@@ -124,4 +169,4 @@ def generate_requirements_from_context(context_file: str) -> str:
         return requirements
     except Exception as e:
         print(f"Error generating requirements from context: {str(e)}")
-        return "# Project Requirements\n\nError generating requirements."
\ No newline at end of file
+        return "# Project Requirements\n\nError generating requirements."
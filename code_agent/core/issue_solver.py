@@ -6,10 +6,14 @@ Usage:
     python codegen_issue_solver.py --issue-number 123 --task-type bug
 """
 import os
+import re
 import sys
 import json
 import time
 import argparse
+import shlex
+import shutil
+import functools
 import subprocess
 from pathlib import Path
 from typing import Dict, Any, Optional
@@ -21,6 +25,26 @@ except ImportError:
     from codegen import Agent
 from code_agent.core.codegen_client import CodegenClient, TaskResult
 
+# Source files searched for issue keywords
+CODE_FILE_GLOBS = ("*.py", "*.js", "*.ts", "*.jsx", "*.tsx", "*.go", "*.java", "*.rb")
+
+# Common words that are never useful as search keywords
+_STOPWORDS = frozenset(("the", "and", "that", "this", "with", "from", "have", "for"))
+# Runs of letters and digits in the issue title
+_TITLE_WORD_RE = re.compile(r'[^\W_]+')
+# Words that look like code (camelCase, snake_case, etc.)
+_CODE_LIKE_RE = re.compile(r'\b[a-zA-Z]+(?:[A-Z][a-z]+)+\b|\b[a-z]+(?:_[a-z]+)+\b')
+# Inline code and code blocks, which often hold error messages
+_CODE_SPAN_RE = re.compile(r'`([^`]+)`|```[^\n]*([^`]+)```')
+_IDENTIFIER_RE = re.compile(r'\w+')
+# Characters that need /bin/sh to interpret a command line
+_SHELL_CHARS_RE = re.compile(r'[|&;<>()$`\\*?\[\]{}~!#=\'"\n]')
+
+@functools.lru_cache(maxsize=None)
+def _has_ripgrep() -> bool:
+    """Check whether ripgrep is installed. Looked up once per process."""
+    return shutil.which("rg") is not None
+
 class IssueContext:
     """Collects and manages context for a GitHub issue."""
     
@@ -80,24 +104,20 @@ class IssueContext:
     def find_relevant_code(self, keywords: list) -> None:
         """Find code snippets related to the issue based on keywords."""
         try:
-            # Use grep to find code containing the keywords
-            file_types = [
-                "--include=*.py", 
-                "--include=*.js", 
-                "--include=*.ts", 
-                "--include=*.jsx", 
-                "--include=*.tsx",
-                "--include=*.go",
-                "--include=*.java",
-                "--include=*.rb"
-            ]
-            
-            # Create a combined grep pattern
+            # Create a combined search pattern
             pattern = "|".join(keywords)
-            grep_command = f"grep -r {' '.join(file_types)} -l -E '{pattern}' ."
             
-            # Run the grep command
-            files = self._run_command(grep_command).strip().split("\n")
+            # Prefer ripgrep, which skips ignored directories such as .git and
+            # node_modules, and fall back to a recursive grep
+            if _has_ripgrep():
+                globs = " ".join(f"-g '{glob}'" for glob in CODE_FILE_GLOBS)
+                search_command = f"rg -l {globs} -e '{pattern}' ."
+            else:
+                includes = " ".join(f"--include={glob}" for glob in CODE_FILE_GLOBS)
+                search_command = f"grep -r {includes} -l -E '{pattern}' ."
+            
+            # Run the search command
+            files = self._run_command(search_command).strip().split("\n")
             files = [f for f in files if f and not f.startswith("./node_modules/") and not f.startswith("./venv/")]
             
             # Limit to 5 most relevant files
@@ -145,45 +165,28 @@ class IssueContext:
     
     def extract_keywords(self) -> list:
         """Extract keywords from the issue title and body."""
-        keywords = []
-        
         # Get issue title and body
-        title = self.context.get("issue", {}).get("title", "")
-        body = self.context.get("issue", {}).get("body", "")
+        issue = self.context.get("issue", {})
+        title = issue.get("title", "")
+        body = issue.get("body", "")
         
-        # Extract keywords from title
-        if title:
-            # Split by spaces and punctuation
-            title_words = ''.join(c if c.isalnum() else ' ' for c in title).split()
-            # Filter out short words and common words
-            title_keywords = [w.lower() for w in title_words if len(w) > 3 and w.lower() not in 
-                             ("the", "and", "that", "this", "with", "from", "have", "for")]
-            keywords.extend(title_keywords)
+        # Extract keywords from title, filtering out short and common words
+        keywords = [w for w in map(str.lower, _TITLE_WORD_RE.findall(title))
+                    if len(w) > 3 and w not in _STOPWORDS]
         
         # Extract keywords from body
         if body:
-            # Look for code blocks or technical terms
-            import re
-            # Find words that look like code (camelCase, snake_case, etc. )
-            code_like = re.findall(r'\b[a-zA-Z]+(?:[A-Z][a-z]+)+\b|\b[a-z]+(?:_[a-z]+)+\b', body)
-            keywords.extend([w.lower() for w in code_like])
+            keywords.extend(w.lower() for w in _CODE_LIKE_RE.findall(body))
             
-            # Find error messages often in quotes or code blocks
-            error_msgs = re.findall(r'`([^`]+)`|```[^\n]*([^`]+)```', body)
-            for match in error_msgs:
-                for group in match:
-                    if group:
-                        # Take the first line which is often the error message
-                        error_line = group.strip().split('\n')[0]
-                        keywords.append(error_line)
+            # Take the words of the first line of each code span, which is
+            # often the error message
+            for match in _CODE_SPAN_RE.findall(body):
+                error_line = (match[0] or match[1]).strip().split('\n')[0]
+                keywords.extend(w for w in map(str.lower, _IDENTIFIER_RE.findall(error_line))
+                                if len(w) > 3 and w not in _STOPWORDS)
         
         # Remove duplicates while preserving order
-        unique_keywords = []
-        for kw in keywords:
-            if kw and kw not in unique_keywords:
-                unique_keywords.append(kw)
-        
-        return unique_keywords[:10]  # Limit to 10 keywords
+        return list(dict.fromkeys(keywords))[:10]  # Limit to 10 keywords
     
     def create_prompt(self, task_type: str) -> str:
         """Create a prompt for the Codegen API based on the collected context."""
@@ -324,17 +327,25 @@ class IssueContext:
             print(f"Error saving context: {e}")
     
     def _run_command(self, command: str) -> str:
-        """Run a shell command and return the output."""
+        """Run a shell command and return the output.
+        
+        Commands that use no shell syntax are executed directly, which saves
+        starting a /bin/sh process for each call.
+        """
         try:
+            use_shell = bool(_SHELL_CHARS_RE.search(command))
             result = subprocess.run(
-                command, 
-                shell=True, 
+                command if use_shell else shlex.split(command), 
+                shell=use_shell, 
                 check=False,  # Don't raise an exception if command fails
                 stdout=subprocess.PIPE, 
                 stderr=subprocess.PIPE,
                 text=True
             )
             return result.stdout
+        except FileNotFoundError:
+            # The executable is missing; fail quietly, as the shell does
+            return ""
         except Exception as e:
             print(f"Command error: {e}")
             return ""
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+JSON helpers shared by the Code Agent modules
+
+Uses orjson when it is installed and falls back to the standard json module.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    def dumps_indented(data: Any) -> bytes:
+        """Serialize data to indented JSON bytes."""
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def dumps_indented(data: Any) -> bytes:
+        """Serialize data to indented JSON bytes."""
+        return json.dumps(data, indent=2).encode('utf-8')
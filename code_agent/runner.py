@@ -14,11 +14,16 @@ Usage:
 import os
 import sys
 import argparse
+import functools
 import importlib.util
 from pathlib import Path
 
-def main():
-    # Parse command line arguments
+@functools.lru_cache(maxsize=None)
+def _build_parser(mode=None):
+    """Build the argument parser for a mode, or just the mode option when no mode is given.
+    
+    Parsers are cached per mode, so each one is only built once per process.
+    """
     parser = argparse.ArgumentParser(description="Code Agent Runner")
     parser.add_argument(
         "--mode", 
@@ -27,11 +32,8 @@ def main():
         help="Mode to run: issue (solve a GitHub issue), context (manage context), workflow (run CI/CD workflow)"
     )
     
-    # First parse just the mode to determine which additional arguments to add
-    args, remaining = parser.parse_known_args()
-    
     # Add additional arguments based on the mode
-    if args.mode == "issue":
+    if mode == "issue":
         parser.add_argument("--issue-number", type=int, required=True, help="GitHub issue number")
         parser.add_argument("--task-type", default="bug", 
                         choices=["bug", "feature", "documentation", "code_review", "refactoring"], 
@@ -39,7 +41,7 @@ def main():
         parser.add_argument("--org-id", help="CodeGen organization ID (can also use CODEGEN_ORG_ID env var)")
         parser.add_argument("--token", help="CodeGen API token (can also use CODEGEN_TOKEN env var)")
     
-    elif args.mode == "context":
+    elif mode == "context":
         subparsers = parser.add_subparsers(dest="command", help="Command to run")
         
         # Collect command
@@ -59,7 +61,7 @@ def main():
                                choices=["bug", "feature", "documentation", "code_review", "refactoring"],
                                help="Type of task")
     
-    elif args.mode == "workflow":
+    elif mode == "workflow":
         parser.add_argument("--github-token", help="GitHub API token")
         parser.add_argument("--ngrok-token", help="ngrok authentication token")
         parser.add_argument("--repo-name", help="GitHub repository name (format: owner/repo)")
@@ -67,8 +69,14 @@ def main():
         parser.add_argument("--codegen-org-id", help="CodeGen organization ID")
         parser.add_argument("--webhook-port", type=int, default=5000, help="Port for webhook server (default: 5000)")
     
-    # Parse all arguments
-    args = parser.parse_args()
+    return parser
+
+def main():
+    # First parse just the mode to determine which additional arguments to add
+    args, remaining = _build_parser().parse_known_args()
+    
+    # Parse all arguments with the parser for that mode
+    args = _build_parser(args.mode).parse_args()
     
     # Import the appropriate modules based on the mode
     try:
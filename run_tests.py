@@ -18,11 +18,11 @@ Options:
     --junit-report/-j     Generate JUnit XML report
     --no-capture/-s       Don't capture stdout/stderr
     --pdb                 Drop into debugger on failures
+    --workers/-n N        Run tests in N parallel workers ("auto" for one per core)
     --help                Show this help message
 """
 
 import sys
-import os
 import argparse
 import subprocess
 
@@ -69,6 +69,10 @@ def parse_args():
         action="store_true", 
         help="Drop into debugger on failures"
     )
+    parser.add_argument(
+        "-n", "--workers", 
+        help="Run tests in parallel workers with pytest-xdist (a number, or auto for one per core)"
+    )
     
     return parser.parse_args()
 
@@ -90,6 +94,11 @@ def run_tests(args):
     if args.pdb:
         cmd.append("--pdb")
     
+    # Add parallel workers, keeping each test class (or module of test
+    # functions) on a single worker so class-level fixtures are set up once
+    if args.workers:
+        cmd.extend(["-n", args.workers, "--dist=loadscope"])
+    
     # Add JUnit report
     if args.junit_report:
         cmd.append("--junitxml=test-results.xml")
@@ -20,12 +20,17 @@ setup(
         "dev": [
             "pytest>=6.0.0",
             "pytest-cov>=2.10.0",
+            "pytest-xdist>=2.0.0",
             "black>=20.8b1",
             "flake8>=3.8.0",
         ],
         "test": [
             "pytest>=6.0.0",
             "pytest-cov>=2.10.0",
+            "pytest-xdist>=2.0.0",
+        ],
+        "speedups": [
+            "orjson>=3.0.0",
         ],
     },
     entry_points={
@@ -11,6 +11,7 @@ Usage:
     python start.py
 """
 
+import io
 import os
 import sys
 import time
@@ -19,6 +20,33 @@ import argparse
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Union
 
+from code_agent.core.config import reset_env_cache
+
+# Environment variables required by Code Agent, with a description for each
+REQUIRED_ENV_VARS = {
+    "CODEGEN_TOKEN": "CodeGen API token",
+    "CODEGEN_ORG_ID": "CodeGen organization ID",
+    "GITHUB_TOKEN": "GitHub token"
+}
+
+# Task types offered by the issue solver, in menu order
+TASK_TYPES = ["bug", "feature", "documentation", "code_review", "refactoring"]
+
+# Menus are built once and written in a single call each time they are shown
+MAIN_MENU = (
+    "Select an option:\n"
+    "1. Full Test Launch - Run all tests to verify the installation\n"
+    "2. Demo Launch - Run the demo with a sample GitHub project\n"
+    "3. Advanced Example - Run with an actual GitHub project selected by the user\n"
+    "4. Exit\n"
+)
+TASK_MENU = "\nSelect task type:\n" + "".join(
+    f"{i}. {task_type}\n" for i, task_type in enumerate(TASK_TYPES, 1)
+)
+
+# Whether run_tests() has already run pytest in this process
+_tests_ran_in_process = False
+
 def clear_screen():
     """Clear the terminal screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -32,43 +60,43 @@ def print_header():
     print("\nWelcome to Code Agent - AI-powered GitHub issue solver and workflow automation\n")
 
 def run_command(command, capture_output=True):
-    """Run a shell command and optionally return the output."""
+    """Run a shell command and optionally return the output.
+
+    When capturing, stdout is streamed to the terminal line by line while it
+    is collected, so long-running commands still show progress. stderr goes
+    straight to the terminal and is not part of the returned output.
+    """
     print(f"Running: {command}")
-    if capture_output:
-        result = subprocess.run(command, shell=True, text=True, capture_output=True)
-        if result.returncode != 0:
-            print(f"Command failed with error: {result.stderr}")
-        return result.stdout
-    else:
+    if not capture_output:
         # Run without capturing output (shows in real-time)
-        subprocess.run(command, shell=True, text=True)
+        subprocess.call(command, shell=True)
         return None
 
+    output = io.StringIO()
+    with subprocess.Popen(command, shell=True, text=True, bufsize=1,
+                          stdout=subprocess.PIPE) as process:
+        for line in process.stdout:
+            sys.stdout.write(line)
+            output.write(line)
+    if process.returncode != 0:
+        print(f"Command failed with exit code {process.returncode}")
+    return output.getvalue()
+
 def check_environment():
     """Check if required environment variables are set."""
-    required_vars = {
-        "CODEGEN_TOKEN": "CodeGen API token",
-        "CODEGEN_ORG_ID": "CodeGen organization ID",
-        "GITHUB_TOKEN": "GitHub token"
-    }
-    
-    missing_vars = []
-    for var, description in required_vars.items():
-        if not os.environ.get(var):
-            missing_vars.append(f"{var} ({description})")
-    
-    if missing_vars:
-        print("\n⚠️  Missing environment variables:")
-        for var in missing_vars:
-            print(f"  - {var}")
-        print("\nPlease set these variables in a .env file or in your environment.")
-        print("You can use the .env.example file as a template.")
-        
-        # Ask if user wants to continue anyway
-        response = input("\nDo you want to continue anyway? (y/n): ").strip().lower()
-        return response == 'y'
+    missing_vars = [var for var in REQUIRED_ENV_VARS if not os.environ.get(var)]
+    if not missing_vars:
+        return True
+    
+    print("\n⚠️  Missing environment variables:")
+    for var in missing_vars:
+        print(f"  - {var} ({REQUIRED_ENV_VARS[var]})")
+    print("\nPlease set these variables in a .env file or in your environment.")
+    print("You can use the .env.example file as a template.")
     
-    return True
+    # Ask if user wants to continue anyway
+    response = input("\nDo you want to continue anyway? (y/n): ").strip().lower()
+    return response == 'y'
 
 def load_env_file():
     """Load environment variables from .env file if it exists."""
@@ -81,6 +109,8 @@ def load_env_file():
                 if line and not line.startswith('#'):
                     key, value = line.split('=', 1)
                     os.environ[key] = value
+        # Configuration loaded from here on should see the new variables
+        reset_env_cache()
         return True
     else:
         print("No .env file found. Using existing environment variables.")
@@ -91,8 +121,23 @@ def run_tests():
     print_header()
     print("Running all tests to verify the installation...\n")
     
-    # Run the tests
-    run_command("python run_tests.py", capture_output=False)
+    # The first run can use pytest in this interpreter, which saves starting
+    # another Python process. pytest.main() should not be called repeatedly in
+    # one process, so later runs, and runs without pytest installed, go
+    # through run_tests.py, which also installs missing test dependencies.
+    global _tests_ran_in_process
+    pytest = None
+    if not _tests_ran_in_process:
+        try:
+            import pytest
+        except ImportError:
+            pass
+    
+    if pytest is None:
+        run_command(f"{sys.executable} run_tests.py", capture_output=False)
+    else:
+        _tests_ran_in_process = True
+        pytest.main(["tests/", "--tb=short"])
     
     input("\nPress Enter to return to the main menu...")
 
@@ -149,14 +194,12 @@ def run_advanced_example():
             input("\nPress Enter to return to the main menu...")
             return
         
-        task_types = ["bug", "feature", "documentation", "code_review", "refactoring"]
-        print("\nSelect task type:")
-        for i, task_type in enumerate(task_types, 1):
-            print(f"{i}. {task_type}")
+        sys.stdout.write(TASK_MENU)
+        sys.stdout.flush()
         
         task_choice = input("\nEnter your choice (1-5): ").strip()
         try:
-            task_type = task_types[int(task_choice) - 1]
+            task_type = TASK_TYPES[int(task_choice) - 1]
         except (ValueError, IndexError):
             task_type = "bug"  # Default
         
@@ -213,11 +256,8 @@ def main_menu():
     """Display the main menu and handle user input."""
     while True:
         print_header()
-        print("Select an option:")
-        print("1. Full Test Launch - Run all tests to verify the installation")
-        print("2. Demo Launch - Run the demo with a sample GitHub project")
-        print("3. Advanced Example - Run with an actual GitHub project selected by the user")
-        print("4. Exit")
+        sys.stdout.write(MAIN_MENU)
+        sys.stdout.flush()
         
         choice = input("\nEnter your choice (1-4): ").strip()
         
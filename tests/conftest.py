@@ -3,18 +3,18 @@
 Pytest configuration file for Code Agent tests
 """
 
-import os
 import sys
 import pytest
+from argparse import Namespace
+from pathlib import Path
 
 # Add the parent directory to sys.path to allow importing the code_agent module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Define fixtures that can be reused across test files
 @pytest.fixture
 def mock_issue_args():
     """Fixture for issue mode arguments"""
-    from argparse import Namespace
     return Namespace(
         mode='issue',
         issue_number=123,
@@ -26,7 +26,6 @@ def mock_issue_args():
 @pytest.fixture
 def mock_context_args():
     """Fixture for context mode arguments"""
-    from argparse import Namespace
     return Namespace(
         mode='context',
         command='collect',
@@ -41,7 +40,6 @@ def mock_context_args():
 @pytest.fixture
 def mock_workflow_args():
     """Fixture for workflow mode arguments"""
-    from argparse import Namespace
     return Namespace(
         mode='workflow',
         github_token='github-token',
@@ -52,3 +50,8 @@ def mock_workflow_args():
         webhook_port=5000
     )
 
+
+@pytest.fixture(autouse=True)
+def _fast_sleep(monkeypatch):
+    """Fixture that makes time.sleep return immediately in every test"""
+    monkeypatch.setattr('time.sleep', lambda *_args, **_kwargs: None)
@@ -3,24 +3,50 @@ Tests for the Codegen client module.
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, Mock, MagicMock, PropertyMock, AsyncMock, create_autospec
+import asyncio
 import json
 import os
 import time
 import requests
+from types import SimpleNamespace
 
 from code_agent.core.codegen_client import CodegenClient, TaskStatus, TaskResult, CircuitBreaker, CircuitBreakerState, ReviewType
 
+
+class _AgentSpec:
+    """The part of the Codegen SDK's Agent interface the client uses."""
+    
+    def run(self, prompt):
+        """Start a task for the prompt."""
+
+
+def _response_stub(json_data=None, text=""):
+    """Build a successful HTTP response stub that records no calls."""
+    return SimpleNamespace(text=text, raise_for_status=lambda: None, json=lambda: json_data)
+
+
+# Successful response to posting a PR comment
+COMMENT_RESPONSE = _response_stub({"id": 12345})
+
 class TestCircuitBreaker(unittest.TestCase):
     """Test cases for the CircuitBreaker class."""
     
     def setUp(self):
         """Set up test environment."""
+        # Drive the circuit breaker from a fake clock instead of sleeping
+        self.now = 1000.0
+        
         self.circuit = CircuitBreaker(
             failure_threshold=3,
-            recovery_timeout=0.1  # Short timeout for testing
+            recovery_timeout=0.1,  # Short timeout for testing
+            clock=lambda: self.now
         )
     
+    def _advance_clock(self, seconds):
+        """Move the fake clock forward by the given number of seconds."""
+        self.now += seconds
+    
     def test_initial_state(self):
         """Test initial state of the circuit breaker."""
         self.assertEqual(self.circuit.state, CircuitBreakerState.CLOSED)
@@ -43,8 +69,8 @@ class TestCircuitBreaker(unittest.TestCase):
         for _ in range(3):
             self.circuit.record_failure()
         
-        # Wait for recovery timeout
-        time.sleep(0.2)
+        # Move past the recovery timeout
+        self._advance_clock(0.2)
         
         # Circuit should allow one request (half-open)
         self.assertTrue(self.circuit.allow_request())
@@ -56,8 +82,8 @@ class TestCircuitBreaker(unittest.TestCase):
         for _ in range(3):
             self.circuit.record_failure()
         
-        # Wait for recovery timeout
-        time.sleep(0.2)
+        # Move past the recovery timeout
+        self._advance_clock(0.2)
         
         # Circuit should be half-open
         self.assertTrue(self.circuit.allow_request())
@@ -76,8 +102,8 @@ class TestCircuitBreaker(unittest.TestCase):
         for _ in range(3):
             self.circuit.record_failure()
         
-        # Wait for recovery timeout
-        time.sleep(0.2)
+        # Move past the recovery timeout
+        self._advance_clock(0.2)
         
         # Circuit should be half-open
         self.assertTrue(self.circuit.allow_request())
@@ -93,37 +119,100 @@ class TestCircuitBreaker(unittest.TestCase):
 class TestCodegenClient(unittest.TestCase):
     """Test cases for the CodegenClient class."""
     
-    def setUp(self):
-        """Set up test environment."""
-        # Mock environment variables
-        self.env_patcher = patch.dict(os.environ, {
-            "CODEGEN_TOKEN": "test-token",
-            "CODEGEN_ORG_ID": "test-org-id"
-        })
-        self.env_patcher.start()
+    @classmethod
+    def setUpClass(cls):
+        """Set up the mocks and client shared by all tests in this class."""
+        # Mock the Agent factory
+        cls.mock_agent_class = MagicMock()
+        cls.mock_agent = create_autospec(_AgentSpec, instance=True)
+        cls.mock_agent_class.return_value = cls.mock_agent
         
-        # Mock the Agent class
-        self.agent_patcher = patch('code_agent.core.codegen_client.Agent')
-        self.mock_agent_class = self.agent_patcher.start()
-        self.mock_agent = MagicMock()
-        self.mock_agent_class.return_value = self.mock_agent
+        # Mock sleep so polling and retry backoff don't wait
+        cls.mock_sleep = Mock()
         
         # Create a client instance
-        self.client = CodegenClient(
-            polling_interval=0.1,  # Use small values for testing
-            polling_timeout=1.0
+        cls.client = CodegenClient(
+            api_key="test-token",
+            org_id="test-org-id",
+            polling_interval=0.0,  # Poll without waiting
+            polling_timeout=1.0,
+            agent_factory=cls.mock_agent_class,
+            sleep=cls.mock_sleep
+        )
+        
+        # Task results for the JSON parsing tests
+        cls.TR_CODE_BLOCK = TaskResult(
+            task_id="test-task-id",
+            status=TaskStatus.COMPLETED,
+            result="""
+            Here's the result:
+            
+            ```json
+            {
+                "key": "value",
+                "number": 42
+            }
+            ```
+            """
+        )
+        cls.TR_OBJECT = TaskResult(
+            task_id="test-task-id",
+            status=TaskStatus.COMPLETED,
+            result="""
+            Here's the result:
+            
+            {"key": "value", "number": 42}
+            
+            Hope that helps!
+            """
+        )
+        cls.TR_FIRST_OBJECT = TaskResult(
+            task_id="test-task-id",
+            status=TaskStatus.COMPLETED,
+            result='Result: {"key": "value", "number": 42} (see {notes})'
+        )
+        cls.TR_DIRECT = TaskResult(
+            task_id="test-task-id",
+            status=TaskStatus.COMPLETED,
+            result='{"key": "value", "number": 42}'
+        )
+        cls.TR_COMMENTS = TaskResult(
+            task_id="test-task-id",
+            status=TaskStatus.COMPLETED,
+            result="""
+            # This is a comment
+            {"key": "value", "number": 42}
+            # This is another comment
+            """
+        )
+        cls.TR_INVALID = TaskResult(
+            task_id="test-task-id",
+            status=TaskStatus.COMPLETED,
+            result="This is not JSON"
         )
     
-    def tearDown(self):
-        """Clean up after tests."""
-        self.env_patcher.stop()
-        self.agent_patcher.stop()
+    def setUp(self):
+        """Reset the shared mocks and circuit breaker before each test."""
+        self.mock_agent.reset_mock(return_value=True, side_effect=True)
+        self.mock_agent_class.reset_mock()
+        self.mock_sleep.reset_mock(side_effect=True)
+        breaker = self.client.circuit_breaker
+        breaker.__init__(
+            failure_threshold=breaker.failure_threshold,
+            recovery_timeout=breaker.recovery_timeout
+        )
     
     def test_initialization(self):
-        """Test client initialization."""
+        """Test client initialization from environment variables."""
+        with patch.dict(os.environ, {
+            "CODEGEN_TOKEN": "test-token",
+            "CODEGEN_ORG_ID": "test-org-id"
+        }):
+            client = CodegenClient(agent_factory=self.mock_agent_class)
+        
         # Check that the client was initialized with the correct values
-        self.assertEqual(self.client.api_key, "test-token")
-        self.assertEqual(self.client.org_id, "test-org-id")
+        self.assertEqual(client.api_key, "test-token")
+        self.assertEqual(client.org_id, "test-org-id")
         
         # Check that the Agent was initialized correctly
         self.mock_agent_class.assert_called_once_with(
@@ -135,7 +224,8 @@ class TestCodegenClient(unittest.TestCase):
         """Test client initialization with explicit arguments."""
         client = CodegenClient(
             api_key="arg-token",
-            org_id="arg-org-id"
+            org_id="arg-org-id",
+            agent_factory=self.mock_agent_class
         )
         
         # Check that the client was initialized with the correct values
@@ -158,7 +248,7 @@ class TestCodegenClient(unittest.TestCase):
             "CODEGEN_CIRCUIT_BREAKER_THRESHOLD": "10",
             "CODEGEN_CIRCUIT_BREAKER_RECOVERY_TIME": "120.0"
         }):
-            client = CodegenClient()
+            client = CodegenClient(agent_factory=self.mock_agent_class)
             
             # Check that the client was initialized with the correct values
             self.assertEqual(client.api_key, "env-api-key")
@@ -180,9 +270,12 @@ class TestCodegenClient(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.client._validate_prompt("")
         
-        # Too long prompt
-        with self.assertRaises(ValueError):
-            self.client._validate_prompt("x" * 33000)
+        # Prompts at the limit are accepted, longer ones are rejected;
+        # lower the limit so the test doesn't build a 32k-character string
+        with patch('code_agent.core.codegen_client.MAX_PROMPT_LEN', 10):
+            self.client._validate_prompt("x" * 10)
+            with self.assertRaises(ValueError):
+                self.client._validate_prompt("x" * 11)
     
     def test_calculate_retry_delay(self):
         """Test retry delay calculation."""
@@ -198,7 +291,7 @@ class TestCodegenClient(unittest.TestCase):
     def test_run_task_success(self):
         """Test running a task successfully."""
         # Mock the task
-        mock_task = MagicMock()
+        mock_task = Mock()
         mock_task.id = "test-task-id"
         mock_task.status = "completed"
         mock_task.result = "Task result"
@@ -218,53 +311,94 @@ class TestCodegenClient(unittest.TestCase):
     
     def test_run_task_with_polling(self):
         """Test running a task with polling for completion."""
-        # Mock the task
-        mock_task = MagicMock()
-        mock_task.id = "test-task-id"
-        mock_task.status = "running"  # Initial status
-        mock_task.result = "Task result"
+        # Mock the task, reporting "running" on the first poll and "completed" on the next
+        mock_task = Mock(id="test-task-id", result="Task result")
+        type(mock_task).status = PropertyMock(side_effect=["running", "completed"])
         
         # Configure the mock agent to return the mock task
         self.mock_agent.run.return_value = mock_task
         
-        # Configure the task to change status after refresh
-        def update_status():
-            mock_task.status = "completed"
-        mock_task.refresh.side_effect = update_status
-        
         # Run the task
         result = self.client.run_task("Test prompt")
         
         # Check that the agent was called correctly
         self.mock_agent.run.assert_called_once_with(prompt="Test prompt")
         
-        # Check that refresh was called
-        mock_task.refresh.assert_called()
+        # Check that the task was polled once per status in the sequence,
+        # without sleeping between polls since the interval is zero
+        self.assertEqual(mock_task.refresh.call_count, 2)
+        self.mock_sleep.assert_not_called()
         
         # Check the result
         self.assertEqual(result.task_id, "test-task-id")
         self.assertEqual(result.status, TaskStatus.COMPLETED)
         self.assertEqual(result.result, "Task result")
     
+    def test_arun_task_with_polling(self):
+        """Test running a task asynchronously with polling for completion."""
+        # Mock the task, reporting "running" on the first poll and "completed" on the next
+        mock_task = Mock(id="test-task-id", result="Task result")
+        type(mock_task).status = PropertyMock(side_effect=["running", "completed"])
+        
+        # Configure the mock agent to return the mock task
+        self.mock_agent.run.return_value = mock_task
+        
+        # Run the task, without waiting between polls
+        with patch('code_agent.core.codegen_client.asyncio.sleep', new_callable=AsyncMock) as mock_async_sleep:
+            result = asyncio.run(self.client.arun_task("Test prompt"))
+        
+        # Check that the agent was called correctly and polling slept once
+        self.mock_agent.run.assert_called_once_with(prompt="Test prompt")
+        mock_async_sleep.assert_awaited_once()
+        self.mock_sleep.assert_not_called()
+        
+        # Check the result
+        self.assertEqual(result.task_id, "test-task-id")
+        self.assertEqual(result.status, TaskStatus.COMPLETED)
+        self.assertEqual(result.result, "Task result")
+    
+    def test_polling_uses_exponential_backoff(self):
+        """Test that the polling interval grows while the status is unchanged, up to the cap."""
+        client = CodegenClient(
+            api_key="test-token",
+            org_id="test-org-id",
+            polling_interval=1.0,
+            max_poll_interval=3.0,
+            agent_factory=self.mock_agent_class,
+            sleep=self.mock_sleep
+        )
+        
+        # Mock the task, staying "running" for several polls before completing
+        mock_task = Mock(id="test-task-id", result="Task result")
+        type(mock_task).status = PropertyMock(side_effect=["running"] * 5 + ["completed"])
+        self.mock_agent.run.return_value = mock_task
+        
+        # Run the task with jitter pinned to a factor of 1.0
+        with patch('code_agent.core.codegen_client.random.random', return_value=0.5):
+            result = client.run_task("Test prompt")
+        
+        # Check that the delays grew by 1.5x per unchanged poll and were capped
+        self.assertEqual(result.status, TaskStatus.COMPLETED)
+        self.assertEqual(
+            [c.args for c in self.mock_sleep.call_args_list],
+            [(1.0,), (1.5,), (2.25,), (3.0,), (3.0,)]
+        )
+    
     def test_run_task_failure(self):
         """Test handling a failed task."""
-        # Mock the task
-        mock_task = MagicMock()
-        mock_task.id = "test-task-id"
-        mock_task.status = "running"  # Initial status
-        mock_task.error = "Task failed"
+        # Mock the task, reporting "running" on the first poll and "failed" on the next
+        mock_task = Mock(id="test-task-id", error="Task failed")
+        type(mock_task).status = PropertyMock(side_effect=["running", "failed"])
         
         # Configure the mock agent to return the mock task
         self.mock_agent.run.return_value = mock_task
         
-        # Configure the task to change status after refresh
-        def update_status():
-            mock_task.status = "failed"
-        mock_task.refresh.side_effect = update_status
-        
         # Run the task
         result = self.client.run_task("Test prompt")
         
+        # Check that the task was polled once per status in the sequence
+        self.assertEqual(mock_task.refresh.call_count, 2)
+        
         # Check the result
         self.assertEqual(result.task_id, "test-task-id")
         self.assertEqual(result.status, TaskStatus.FAILED)
@@ -273,41 +407,67 @@ class TestCodegenClient(unittest.TestCase):
     def test_run_task_timeout(self):
         """Test handling a task timeout."""
         # Mock the task
-        mock_task = MagicMock()
+        mock_task = Mock()
         mock_task.id = "test-task-id"
         mock_task.status = "running"  # Status never changes
         
         # Configure the mock agent to return the mock task
         self.mock_agent.run.return_value = mock_task
         
-        # Run the task (should timeout quickly due to our short polling_timeout)
-        result = self.client.run_task("Test prompt")
+        # Jump the clock past polling_timeout after the first poll
+        with patch.object(self.client, '_clock', side_effect=iter([0.0, 0.0, 2.0, 2.0])):
+            result = self.client.run_task("Test prompt")
         
         # Check the result
         self.assertEqual(result.task_id, "test-task-id")
         self.assertEqual(result.status, TaskStatus.FAILED)
         self.assertTrue("timed out" in result.error)
+        self.assertLessEqual(mock_task.refresh.call_count, 1)
     
-    def test_run_task_with_circuit_breaker(self):
-        """Test running a task with circuit breaker."""
+    def test_run_task_retry_backoff(self):
+        """Test that retries back off exponentially between attempts."""
         # Mock the agent to raise an exception
         self.mock_agent.run.side_effect = Exception("API error")
         
-        # Run the task multiple times to trigger circuit breaker
-        for _ in range(5):
-            result = self.client.run_task("Test prompt")
-            self.assertEqual(result.status, TaskStatus.FAILED)
+        # Run the task with jitter pinned to a factor of 1.0
+        with patch('code_agent.core.codegen_client.random.random', return_value=0.5):
+            self.client.run_task("Test prompt")
         
-        # Circuit should be open now
-        self.assertEqual(self.client.circuit_breaker.state, CircuitBreakerState.OPEN)
+        # Check that the retry delays doubled (no sleep after the final attempt)
+        self.assertEqual(
+            [c.args for c in self.mock_sleep.call_args_list],
+            [(2.0,), (4.0,)]
+        )
+    
+    def test_run_task_short_circuits_when_open(self):
+        """Test that an open circuit breaker blocks the request."""
+        # Open the circuit directly instead of driving it through real failures
+        self.client.circuit_breaker.state = CircuitBreakerState.OPEN
+        self.client.circuit_breaker.last_failure_time = time.time()
         
-        # Next request should be blocked by circuit breaker
+        # Request should be blocked by circuit breaker
         result = self.client.run_task("Test prompt")
         self.assertEqual(result.status, TaskStatus.FAILED)
         self.assertTrue("Service is currently unavailable" in result.error)
         
-        # Mock agent should not have been called again
-        self.assertEqual(self.mock_agent.run.call_count, 5 * self.client.max_retries)
+        # Agent should not have been called
+        self.mock_agent.run.assert_not_called()
+    
+    def test_run_task_records_failure_on_exception(self):
+        """Test that exhausting the retries records a circuit breaker failure."""
+        # Mock the agent to raise an exception
+        self.mock_agent.run.side_effect = Exception("API error")
+        
+        # Run the task
+        result = self.client.run_task("Test prompt")
+        
+        # Check the result
+        self.assertEqual(result.status, TaskStatus.FAILED)
+        self.assertEqual(result.error, "API error")
+        
+        # Each attempt should have been made, with a single failure recorded
+        self.assertEqual(self.mock_agent.run.call_count, self.client.max_retries)
+        self.assertEqual(self.client.circuit_breaker.failure_count, 1)
     
     def test_run_task_with_invalid_prompt(self):
         """Test running a task with an invalid prompt."""
@@ -323,156 +483,97 @@ class TestCodegenClient(unittest.TestCase):
     
     def test_parse_json_result_code_block(self):
         """Test parsing JSON from a code block."""
-        # Create a task result with JSON in a code block
-        task_result = TaskResult(
-            task_id="test-task-id",
-            status=TaskStatus.COMPLETED,
-            result="""
-            Here's the result:
-            
-            ```json
-            {
-                "key": "value",
-                "number": 42
-            }
-            ```
-            """
-        )
-        
-        # Parse the JSON
-        result = self.client.parse_json_result(task_result)
-        
-        # Check the result
+        result = self.client.parse_json_result(self.TR_CODE_BLOCK)
         self.assertEqual(result, {"key": "value", "number": 42})
     
     def test_parse_json_result_object(self):
         """Test parsing JSON from an object in the result."""
-        # Create a task result with a JSON object
-        task_result = TaskResult(
-            task_id="test-task-id",
-            status=TaskStatus.COMPLETED,
-            result="""
-            Here's the result:
-            
-            {"key": "value", "number": 42}
-            
-            Hope that helps!
-            """
-        )
-        
-        # Parse the JSON
-        result = self.client.parse_json_result(task_result)
-        
-        # Check the result
+        result = self.client.parse_json_result(self.TR_OBJECT)
+        self.assertEqual(result, {"key": "value", "number": 42})
+    
+    def test_parse_json_result_first_object(self):
+        """Test parsing the first JSON object when the result contains trailing braces."""
+        result = self.client.parse_json_result(self.TR_FIRST_OBJECT)
         self.assertEqual(result, {"key": "value", "number": 42})
     
     def test_parse_json_result_direct(self):
         """Test parsing JSON directly from the result."""
-        # Create a task result with direct JSON
-        task_result = TaskResult(
-            task_id="test-task-id",
-            status=TaskStatus.COMPLETED,
-            result='{"key": "value", "number": 42}'
-        )
-        
-        # Parse the JSON
-        result = self.client.parse_json_result(task_result)
-        
-        # Check the result
+        result = self.client.parse_json_result(self.TR_DIRECT)
         self.assertEqual(result, {"key": "value", "number": 42})
     
     def test_parse_json_result_with_comments(self):
         """Test parsing JSON with comment lines."""
-        # Create a task result with JSON and comment lines
+        result = self.client.parse_json_result(self.TR_COMMENTS)
+        self.assertEqual(result, {"key": "value", "number": 42})
+    
+    def test_parse_json_result_bytes(self):
+        """Test parsing JSON from a result given as bytes."""
         task_result = TaskResult(
             task_id="test-task-id",
             status=TaskStatus.COMPLETED,
-            result="""
-            # This is a comment
-            {"key": "value", "number": 42}
-            # This is another comment
-            """
+            result=self.TR_COMMENTS.result.encode("utf-8")
         )
         
-        # Parse the JSON
         result = self.client.parse_json_result(task_result)
-        
-        # Check the result
-        self.assertEqual(result, {"key": "value", "number": 42})
+        self.assertEqual(result, self.client.parse_json_result(self.TR_COMMENTS))
     
     def test_parse_json_result_error(self):
         """Test handling a JSON parsing error."""
-        # Create a task result with invalid JSON
-        task_result = TaskResult(
-            task_id="test-task-id",
-            status=TaskStatus.COMPLETED,
-            result="This is not JSON"
-        )
-        
         # Try to parse the JSON (should raise an error)
         with self.assertRaises(ValueError):
-            self.client.parse_json_result(task_result)
+            self.client.parse_json_result(self.TR_INVALID)
 
 class TestPRReviewFunctionality(unittest.TestCase):
     """Test cases for the PR review functionality."""
     
-    def setUp(self):
-        """Set up test environment."""
-        # Mock environment variables
-        self.env_patcher = patch.dict(os.environ, {
-            "CODEGEN_TOKEN": "test-token",
-            "CODEGEN_ORG_ID": "test-org-id",
-            "GITHUB_TOKEN": "test-github-token"
-        })
-        self.env_patcher.start()
+    @classmethod
+    def setUpClass(cls):
+        """Set up the mocks and client shared by all tests in this class."""
+        # Mock the Agent factory
+        cls.mock_agent_class = MagicMock()
+        cls.mock_agent = create_autospec(_AgentSpec, instance=True)
+        cls.mock_agent_class.return_value = cls.mock_agent
         
-        # Mock the Agent class
-        self.agent_patcher = patch('code_agent.core.codegen_client.Agent')
-        self.mock_agent_class = self.agent_patcher.start()
-        self.mock_agent = MagicMock()
-        self.mock_agent_class.return_value = self.mock_agent
+        # Mock the HTTP session, which makes all GitHub calls
+        cls.mock_session = MagicMock()
         
-        # Mock requests
-        self.requests_patcher = patch('code_agent.core.codegen_client.requests')
-        self.mock_requests = self.requests_patcher.start()
+        # Mock sleep so polling doesn't wait
+        cls.mock_sleep = Mock()
         
         # Create a client instance
-        self.client = CodegenClient(
+        cls.client = CodegenClient(
+            api_key="test-token",
+            org_id="test-org-id",
+            github_token="test-github-token",
             polling_interval=0.1,  # Use small values for testing
-            polling_timeout=1.0
+            polling_timeout=1.0,
+            agent_factory=cls.mock_agent_class,
+            session=cls.mock_session,
+            sleep=cls.mock_sleep
         )
     
-    def tearDown(self):
-        """Clean up after tests."""
-        self.env_patcher.stop()
-        self.agent_patcher.stop()
-        self.requests_patcher.stop()
+    def setUp(self):
+        """Reset the shared mocks before each test."""
+        self.mock_agent.reset_mock(return_value=True, side_effect=True)
+        self.mock_agent_class.reset_mock()
+        self.mock_session.reset_mock(return_value=True, side_effect=True)
+        self.mock_sleep.reset_mock()
     
     def test_parse_review_command(self):
         """Test parsing different review commands."""
-        # Test standard review
-        review_type, options = self.client.parse_review_command("/review")
-        self.assertEqual(review_type, ReviewType.STANDARD)
-        
-        # Test Gemini review
-        review_type, options = self.client.parse_review_command("/gemini-review")
-        self.assertEqual(review_type, ReviewType.GEMINI)
-        
-        # Test Korbit review
-        review_type, options = self.client.parse_review_command("/korbit-review")
-        self.assertEqual(review_type, ReviewType.KORBIT)
-        
-        # Test improve command
-        review_type, options = self.client.parse_review_command("/improve")
-        self.assertEqual(review_type, ReviewType.IMPROVE)
-        
-        # Test with whitespace
-        review_type, options = self.client.parse_review_command("  /gemini-review  ")
-        self.assertEqual(review_type, ReviewType.GEMINI)
-        
-        # Test with uppercase
-        review_type, options = self.client.parse_review_command("/GEMINI-REVIEW")
-        self.assertEqual(review_type, ReviewType.GEMINI)
+        cases = [
+            ("/review", ReviewType.STANDARD),
+            ("/gemini-review", ReviewType.GEMINI),
+            ("/korbit-review", ReviewType.KORBIT),
+            ("/improve", ReviewType.IMPROVE),
+            ("  /gemini-review  ", ReviewType.GEMINI),  # with whitespace
+            ("/GEMINI-REVIEW", ReviewType.GEMINI),  # with uppercase
+        ]
+        
+        for command, expected_type in cases:
+            with self.subTest(command=command):
+                review_type, options = self.client.parse_review_command(command)
+                self.assertEqual(review_type, expected_type)
     
     def test_generate_review_prompt(self):
         """Test generating review prompts for different review types."""
@@ -482,36 +583,25 @@ class TestPRReviewFunctionality(unittest.TestCase):
             "diff": "diff --git a/test.py b/test.py\n..."
         }
         
-        # Test standard review prompt
-        prompt = self.client.generate_review_prompt(ReviewType.STANDARD, pr_data)
-        self.assertIn("Test PR", prompt)
-        self.assertIn("This is a test PR", prompt)
-        self.assertIn("general code review", prompt.lower())
-        
-        # Test Gemini review prompt
-        prompt = self.client.generate_review_prompt(ReviewType.GEMINI, pr_data)
-        self.assertIn("Test PR", prompt)
-        self.assertIn("thorough code review", prompt.lower())
-        self.assertIn("security vulnerabilities", prompt.lower())
-        
-        # Test Korbit review prompt
-        prompt = self.client.generate_review_prompt(ReviewType.KORBIT, pr_data)
-        self.assertIn("Test PR", prompt)
-        self.assertIn("security-focused", prompt.lower())
-        self.assertIn("authentication/authorization", prompt.lower())
-        
-        # Test improve prompt
-        prompt = self.client.generate_review_prompt(ReviewType.IMPROVE, pr_data)
-        self.assertIn("Test PR", prompt)
-        self.assertIn("suggest improvements", prompt.lower())
-        self.assertIn("performance optimizations", prompt.lower())
+        cases = [
+            (ReviewType.STANDARD, ["general code review"]),
+            (ReviewType.GEMINI, ["thorough code review", "security vulnerabilities"]),
+            (ReviewType.KORBIT, ["security-focused", "authentication/authorization"]),
+            (ReviewType.IMPROVE, ["suggest improvements", "performance optimizations"]),
+        ]
+        
+        for review_type, expected_substrings in cases:
+            with self.subTest(review_type=review_type):
+                prompt = self.client.generate_review_prompt(review_type, pr_data)
+                self.assertIn("Test PR", prompt)
+                self.assertIn("This is a test PR", prompt)
+                for expected in expected_substrings:
+                    self.assertIn(expected, prompt.lower())
     
     def test_post_pr_comments(self):
         """Test posting comments to a PR."""
         # Mock successful response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"id": 12345}
-        self.mock_requests.post.return_value = mock_response
+        self.mock_session.post.return_value = COMMENT_RESPONSE
         
         # Test posting comments
         result = self.client.post_pr_comments(
@@ -527,8 +617,15 @@ class TestPRReviewFunctionality(unittest.TestCase):
         self.assertEqual(result["failed_comments"], 0)
         
         # Check that the correct API calls were made
-        self.assertEqual(self.mock_requests.post.call_count, 2)
-        self.mock_requests.post.assert_any_call(
+        self.assertEqual(self.mock_session.post.call_count, 2)
+        
+        # Check that the comments were posted in order with a delay between them
+        self.assertEqual(
+            [kwargs["json"]["body"] for _, kwargs in self.mock_session.post.call_args_list],
+            ["Comment 1", "Comment 3"]
+        )
+        self.mock_sleep.assert_called_once_with(self.client.comment_delay)
+        self.mock_session.post.assert_any_call(
             "https://api.github.com/repos/test-owner/test-repo/issues/1/comments",
             headers={
                 "Authorization": "token test-github-token",
@@ -538,12 +635,36 @@ class TestPRReviewFunctionality(unittest.TestCase):
             timeout=self.client.request_timeout
         )
     
+    def test_post_pr_comments_partial_failure(self):
+        """Test that a failed comment is reported without stopping the others."""
+        # Mock a connection error for the second comment only
+        def post(url, json, **kwargs):
+            if json["body"] == "Comment 2":
+                raise requests.ConnectionError("connection reset")
+            return COMMENT_RESPONSE
+        
+        self.mock_session.post.side_effect = post
+        
+        # Test posting comments
+        result = self.client.post_pr_comments(
+            repo_owner="test-owner",
+            repo_name="test-repo",
+            pr_number=1,
+            comments=["Comment 1", "Comment 2", "Comment 3"]
+        )
+        
+        # Check the counts and that results keep the input order
+        self.assertEqual(result["successful_comments"], 2)
+        self.assertEqual(result["failed_comments"], 1)
+        self.assertEqual(
+            [(r["comment"], r["status"]) for r in result["results"]],
+            [("Comment 1", "success"), ("Comment 2", "error"), ("Comment 3", "success")]
+        )
+    
     def test_parse_and_post_pr_comments(self):
         """Test parsing and posting comments from a task result."""
         # Mock successful response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"id": 12345}
-        self.mock_requests.post.return_value = mock_response
+        self.mock_session.post.return_value = COMMENT_RESPONSE
         
         # Create a task result
         task_result = TaskResult(
@@ -566,31 +687,25 @@ class TestPRReviewFunctionality(unittest.TestCase):
         self.assertEqual(result["failed_comments"], 0)
         
         # Check that the correct API calls were made
-        self.assertEqual(self.mock_requests.post.call_count, 2)
+        self.assertEqual(self.mock_session.post.call_count, 2)
     
     def test_review_pull_request(self):
         """Test reviewing a pull request."""
         # Mock PR data response
-        mock_pr_response = MagicMock()
-        mock_pr_response.json.return_value = {
+        mock_pr_response = _response_stub({
             "title": "Test PR",
             "body": "This is a test PR"
-        }
+        })
         
         # Mock PR diff response
-        mock_diff_response = MagicMock()
-        mock_diff_response.text = "diff --git a/test.py b/test.py\n..."
-        
-        # Mock comment response
-        mock_comment_response = MagicMock()
-        mock_comment_response.json.return_value = {"id": 12345}
+        mock_diff_response = _response_stub(text="diff --git a/test.py b/test.py\n...")
         
         # Configure mock requests
-        self.mock_requests.get.side_effect = [mock_pr_response, mock_diff_response]
-        self.mock_requests.post.return_value = mock_comment_response
+        self.mock_session.get.side_effect = [mock_pr_response, mock_diff_response]
+        self.mock_session.post.return_value = COMMENT_RESPONSE
         
         # Mock task
-        mock_task = MagicMock()
+        mock_task = Mock()
         mock_task.id = "test-task-id"
         mock_task.status = "completed"
         mock_task.result = "Comment 1\n# Comment 2 (should be ignored)\nComment 3"
@@ -613,7 +728,7 @@ class TestPRReviewFunctionality(unittest.TestCase):
         self.assertEqual(result["comments"]["total_comments"], 2)
         
         # Check that the correct API calls were made
-        self.mock_requests.get.assert_any_call(
+        self.mock_session.get.assert_any_call(
             "https://api.github.com/repos/test-owner/test-repo/pulls/1",
             headers={
                 "Authorization": "token test-github-token",
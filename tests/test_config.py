@@ -4,42 +4,72 @@ Test suite for the Code Agent Configuration Manager
 """
 
 import os
-import sys
+import copy
 import json
 import unittest
 import tempfile
 import argparse
 from pathlib import Path
-from unittest.mock import patch, mock_open
+from unittest.mock import patch, mock_open, Mock
 
-# Add the parent directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from code_agent.core.config import CodeAgentConfig, get_config, init_config_from_args, reset_env_cache
 
-from code_agent.core.config import CodeAgentConfig, get_config, init_config_from_args
+# Configuration file contents served by the mocked open() in file-loading tests
+CONFIG_FILE_DATA = {"codegen_token": "file_token", "webhook_port": 8080}
+CONFIG_FILE_JSON = json.dumps(CONFIG_FILE_DATA)
 
 
 class TestCodeAgentConfig(unittest.TestCase):
     """Test cases for the CodeAgentConfig class."""
 
+    # Environment variables read by CodeAgentConfig
+    ENV_VARS = ['CODEGEN_TOKEN', 'CODEGEN_ORG_ID', 'GITHUB_TOKEN',
+                'GITHUB_REPOSITORY', 'NGROK_TOKEN']
+
+    @classmethod
+    def setUpClass(cls):
+        """Build a pristine config once for the whole class."""
+        # Save the original values of the relevant environment variables
+        cls.original_env = {var: os.environ.get(var) for var in cls.ENV_VARS}
+        
+        # Build the prototype config with those variables unset
+        cls._clear_env()
+        CodeAgentConfig._FILE_CACHE.clear()
+        cls.proto_config = CodeAgentConfig()
+        cls._restore_env()
+
+    @classmethod
+    def _clear_env(cls):
+        """Unset the relevant environment variables and drop the cached snapshot."""
+        for var in cls.ENV_VARS:
+            os.environ.pop(var, None)
+        reset_env_cache()
+
+    @classmethod
+    def _restore_env(cls):
+        """Restore the relevant environment variables to their original values."""
+        for var, value in cls.original_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        reset_env_cache()
+
     def setUp(self):
         """Set up test environment before each test."""
-        # Create a fresh config instance for each test
-        self.config = CodeAgentConfig()
+        # Forget configuration files parsed by earlier tests
+        CodeAgentConfig._FILE_CACHE.clear()
         
-        # Save original environment variables to restore later
-        self.original_env = os.environ.copy()
+        # Give each test its own copy of the prototype config
+        self.config = copy.copy(self.proto_config)
         
         # Clear relevant environment variables for testing
-        for var in ['CODEGEN_TOKEN', 'CODEGEN_ORG_ID', 'GITHUB_TOKEN', 
-                    'GITHUB_REPOSITORY', 'NGROK_TOKEN']:
-            if var in os.environ:
-                del os.environ[var]
+        self._clear_env()
 
     def tearDown(self):
         """Clean up after each test."""
         # Restore original environment variables
-        os.environ.clear()
-        os.environ.update(self.original_env)
+        self._restore_env()
 
     def test_default_initialization(self):
         """Test that the config initializes with default values."""
@@ -59,15 +89,18 @@ class TestCodeAgentConfig(unittest.TestCase):
 
     def test_load_from_env(self):
         """Test loading configuration from environment variables."""
-        # Set environment variables
-        os.environ['CODEGEN_TOKEN'] = 'test_token'
-        os.environ['CODEGEN_ORG_ID'] = 'test_org_id'
-        os.environ['GITHUB_TOKEN'] = 'test_github_token'
-        os.environ['GITHUB_REPOSITORY'] = 'test/repo'
-        os.environ['NGROK_TOKEN'] = 'test_ngrok_token'
-        
-        # Create a new config instance to load from environment
-        config = CodeAgentConfig()
+        # Set environment variables for the duration of the load
+        with patch.dict(os.environ, {
+            'CODEGEN_TOKEN': 'test_token',
+            'CODEGEN_ORG_ID': 'test_org_id',
+            'GITHUB_TOKEN': 'test_github_token',
+            'GITHUB_REPOSITORY': 'test/repo',
+            'NGROK_TOKEN': 'test_ngrok_token'
+        }):
+            reset_env_cache()
+            
+            # Create a new config instance to load from environment
+            config = CodeAgentConfig()
         
         # Check that values were loaded from environment
         self.assertEqual(config.codegen_token, 'test_token')
@@ -76,23 +109,75 @@ class TestCodeAgentConfig(unittest.TestCase):
         self.assertEqual(config.repo_name, 'test/repo')
         self.assertEqual(config.ngrok_token, 'test_ngrok_token')
 
+    @patch('pathlib.Path.stat')
     @patch('pathlib.Path.exists')
-    @patch('builtins.open', new_callable=mock_open, read_data='{"codegen_token": "file_token", "webhook_port": 8080}')
-    def test_load_from_file(self, mock_file, mock_exists):
+    @patch('builtins.open', new_callable=mock_open, read_data=CONFIG_FILE_JSON)
+    def test_load_from_file(self, mock_file, mock_exists, mock_stat):
         """Test loading configuration from a JSON file."""
         # Mock that the file exists
         mock_exists.return_value = True
+        mock_stat.return_value = Mock(st_mtime_ns=1)
         
         # Create a new config instance with mocked file
         config = CodeAgentConfig()
         
         # Check that values were loaded from file
-        self.assertEqual(config.codegen_token, 'file_token')
-        self.assertEqual(config.webhook_port, 8080)
+        for key, value in CONFIG_FILE_DATA.items():
+            self.assertEqual(getattr(config, key), value)
         
         # Verify the file was opened
         mock_file.assert_called_with(Path('code_agent_config.json'), 'r')
 
+    @patch('pathlib.Path.stat')
+    @patch('pathlib.Path.exists')
+    @patch('builtins.open', new_callable=mock_open, read_data=CONFIG_FILE_JSON)
+    def test_load_from_file_cached(self, mock_file, mock_exists, mock_stat):
+        """Test that an unchanged configuration file is only read once."""
+        # Mock that the file exists and has not changed
+        mock_exists.return_value = True
+        mock_stat.return_value = Mock(st_mtime_ns=1)
+        
+        # Create two config instances
+        CodeAgentConfig()
+        config = CodeAgentConfig()
+        
+        # The file should have been opened once, with the second instance served from the cache
+        self.assertEqual(config.codegen_token, 'file_token')
+        self.assertEqual(mock_file.call_count, 1)
+        
+        # A new modification time should cause the file to be read again
+        mock_stat.return_value = Mock(st_mtime_ns=2)
+        CodeAgentConfig()
+        self.assertEqual(mock_file.call_count, 2)
+
+    @patch('pathlib.Path.stat')
+    @patch('pathlib.Path.exists')
+    @patch('builtins.open', new_callable=mock_open, read_data='{"webhook_path": {"paths": ["/webhook"]}}')
+    def test_load_from_file_cached_copy(self, mock_file, mock_exists, mock_stat):
+        """Test that instances served from the cache don't share mutable values."""
+        mock_exists.return_value = True
+        mock_stat.return_value = Mock(st_mtime_ns=1)
+        
+        # Changing a nested value on one instance should not affect the next one
+        CodeAgentConfig().webhook_path["paths"].append("/other")
+        config = CodeAgentConfig()
+        
+        self.assertEqual(config.webhook_path, {"paths": ["/webhook"]})
+        self.assertEqual(mock_file.call_count, 1)
+
+    def test_load_from_env_snapshot(self):
+        """Test that environment variables are read once until the cache is reset."""
+        os.environ['CODEGEN_TOKEN'] = 'first_token'
+        reset_env_cache()
+        self.assertEqual(CodeAgentConfig().codegen_token, 'first_token')
+        
+        # Changes are not seen until the snapshot is reset
+        os.environ['CODEGEN_TOKEN'] = 'second_token'
+        self.assertEqual(CodeAgentConfig().codegen_token, 'first_token')
+        
+        reset_env_cache()
+        self.assertEqual(CodeAgentConfig().codegen_token, 'second_token')
+
     def test_update_from_args(self):
         """Test updating configuration from command line arguments."""
         # Create args namespace
@@ -120,11 +205,10 @@ class TestCodeAgentConfig(unittest.TestCase):
         self.config.codegen_token = 'save_token'
         self.config.webhook_port = 7000
         
-        # Use a temporary file for testing
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        try:
+        # Save into a temporary directory that is removed with its contents
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_path = os.path.join(temp_dir, 'config.json')
+            
             # Save config to the temporary file
             result = self.config.save_to_file(temp_path)
             self.assertTrue(result)
@@ -132,22 +216,18 @@ class TestCodeAgentConfig(unittest.TestCase):
             # Read the file and check its contents
             with open(temp_path, 'r') as f:
                 saved_data = json.load(f)
-            
-            self.assertEqual(saved_data['codegen_token'], 'save_token')
-            self.assertEqual(saved_data['webhook_port'], 7000)
-            
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        
+        self.assertEqual(saved_data['codegen_token'], 'save_token')
+        self.assertEqual(saved_data['webhook_port'], 7000)
 
     def test_validate(self):
         """Test configuration validation."""
         # Empty config should have validation errors
         errors = self.config.validate()
-        self.assertEqual(len(errors), 2)
-        self.assertIn("CodeGen API token (codegen_token) is not set", errors)
-        self.assertIn("CodeGen organization ID (codegen_org_id) is not set", errors)
+        self.assertCountEqual(errors, [
+            "CodeGen API token (codegen_token) is not set",
+            "CodeGen organization ID (codegen_org_id) is not set",
+        ])
         
         # Set required values
         self.config.codegen_token = 'valid_token'
@@ -170,9 +250,11 @@ class TestCodeAgentConfig(unittest.TestCase):
         self.assertEqual(config_dict['codegen_token'], 'dict_token')
         self.assertEqual(config_dict['webhook_port'], 6000)
         
-        # Check that private attributes are not included
+        # Check that attributes added later are included and private attributes are not
+        self.config.extra_setting = 'extra'
         self.config._private_attr = 'private'
         config_dict = self.config.get_as_dict()
+        self.assertEqual(config_dict['extra_setting'], 'extra')
         self.assertNotIn('_private_attr', config_dict)
 
     def test_get_config(self):
@@ -195,11 +277,13 @@ class TestCodeAgentConfig(unittest.TestCase):
         # Get reference to the singleton before modification
         from code_agent.core.config import config as global_config
         
-        # Initialize config from args
+        # Initialize config from args, with a variable set after the singleton was created
+        os.environ['CODEGEN_ORG_ID'] = 'init_org_id'
         result = init_config_from_args(args)
         
         # Check that values were updated in the singleton
         self.assertEqual(global_config.codegen_token, 'init_token')
+        self.assertEqual(global_config.codegen_org_id, 'init_org_id')
         self.assertEqual(global_config.webhook_port, 4000)
         
         # Should return the singleton
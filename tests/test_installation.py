@@ -4,80 +4,72 @@ Test script to verify the Code Agent installation
 """
 
 import sys
-import pytest
 import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+# Core modules that make up the Code Agent package
+CORE_MODULES = [
+    "code_agent",
+    "code_agent.core.config",
+    "code_agent.core.context_manager",
+    "code_agent.core.integration",
+    "code_agent.core.issue_solver",
+    "code_agent.core.json_utils",
+    "code_agent.core.workflow",
+    "code_agent.runner",
+    "code_agent.demo"
+]
+
+# Third-party packages Code Agent depends on
+DEPENDENCIES = [
+    "github",
+    "pyngrok",
+    "requests"
+]
 
 def check_module(module_name):
-    """Check if a module can be imported."""
+    """Check if a module can be found, without executing it."""
     try:
-        importlib.import_module(module_name)
-        return True
+        return importlib.util.find_spec(module_name) is not None
     except ImportError:
+        # Raised when a parent package is missing
         return False
 
+def check_modules(module_names):
+    """Check several modules concurrently, returning {name: found} in the given order."""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return dict(zip(module_names, executor.map(check_module, module_names)))
+
 def test_core_modules():
     """Test that all core modules can be imported."""
-    # Check core modules
-    core_modules = [
-        "code_agent",
-        "code_agent.core.config",
-        "code_agent.core.context_manager",
-        "code_agent.core.integration",
-        "code_agent.core.issue_solver",
-        "code_agent.core.workflow",
-        "code_agent.runner",
-        "code_agent.demo"
-    ]
-    
-    for module in core_modules:
-        assert check_module(module), f"Failed to import {module}"
+    for module, found in check_modules(CORE_MODULES).items():
+        assert found, f"Failed to import {module}"
 
 def test_dependencies():
     """Test that all dependencies can be imported."""
-    # Check dependencies
-    dependencies = [
-        "github",
-        "pyngrok",
-        "requests"
-    ]
-    
-    for dep in dependencies:
-        assert check_module(dep), f"Failed to import dependency {dep}"
+    for dep, found in check_modules(DEPENDENCIES).items():
+        assert found, f"Failed to import dependency {dep}"
 
 def main():
     """Main test function for command-line usage."""
     print("Testing Code Agent installation...")
     
-    # Check core modules
-    core_modules = [
-        "code_agent",
-        "code_agent.core.config",
-        "code_agent.core.context_manager",
-        "code_agent.core.integration",
-        "code_agent.core.issue_solver",
-        "code_agent.core.workflow",
-        "code_agent.runner",
-        "code_agent.demo"
-    ]
+    # Check all modules at once, then report them in order
+    results = check_modules(CORE_MODULES + DEPENDENCIES)
     
+    # Check core modules
     all_passed = True
-    for module in core_modules:
-        if check_module(module):
+    for module in CORE_MODULES:
+        if results[module]:
             print(f"✅ {module} - OK")
         else:
             print(f"❌ {module} - FAILED")
             all_passed = False
     
     # Check dependencies
-    dependencies = [
-        "github",
-        "pyngrok",
-        "requests"
-    ]
-    
     print("\nChecking dependencies...")
-    for dep in dependencies:
-        if check_module(dep):
+    for dep in DEPENDENCIES:
+        if results[dep]:
             print(f"✅ {dep} - OK")
         else:
             print(f"❌ {dep} - FAILED")
@@ -11,10 +11,14 @@ import os
 import json
 import tempfile
 import unittest
-from pathlib import Path
 from unittest.mock import patch, mock_open
 
 from code_agent.core.integration import (
+    _extract_from_dict,
+    _load_context,
+    _load_issue_index,
+    load_context,
+    _requirements_from_dict,
     extract_context_for_issue_solving,
     prepare_workflow_from_issue_solution,
     generate_requirements_from_context
@@ -24,10 +28,15 @@ from code_agent.core.integration import (
 class TestIntegration(unittest.TestCase):
     """Test cases for the integration module."""
 
-    def setUp(self):
-        """Set up test fixtures."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up test fixtures shared by all tests in this class."""
+        # Start from empty context caches
+        _load_context.cache_clear()
+        _load_issue_index.cache_clear()
+        
         # Create a sample context data for testing
-        self.sample_context = {
+        cls.sample_context = {
             "repository": "test-repo",
             "issues": [
                 {
@@ -59,20 +68,22 @@ class TestIntegration(unittest.TestCase):
         }
         
         # Create a temporary file with the sample context
-        self.temp_file = tempfile.NamedTemporaryFile(delete=False, mode='w')
-        json.dump(self.sample_context, self.temp_file)
-        self.temp_file.close()
-        self.context_file_path = self.temp_file.name
+        with tempfile.NamedTemporaryFile(delete=False, mode='w') as temp_file:
+            json.dump(cls.sample_context, temp_file)
+        cls.context_file_path = temp_file.name
 
-    def tearDown(self):
-        """Tear down test fixtures."""
-        # Remove the temporary file
-        os.unlink(self.context_file_path)
+    @classmethod
+    def tearDownClass(cls):
+        """Tear down test fixtures shared by all tests in this class."""
+        # Remove the temporary file and forget its parsed contents
+        os.unlink(cls.context_file_path)
+        _load_context.cache_clear()
+        _load_issue_index.cache_clear()
 
     def test_extract_context_for_issue_solving(self):
         """Test extracting context for issue solving."""
         # Test with existing issue number
-        result = extract_context_for_issue_solving(self.context_file_path, 123)
+        result = _extract_from_dict(self.sample_context, 123)
         
         # Verify the result
         self.assertEqual(result['repository'], 'test-repo')
@@ -83,15 +94,33 @@ class TestIntegration(unittest.TestCase):
         self.assertTrue(any('auth.py' in snippet['file'] for snippet in result['code_snippets']))
         
         # Test with non-existent issue number
-        result = extract_context_for_issue_solving(self.context_file_path, 999)
+        result = _extract_from_dict(self.sample_context, 999)
         self.assertEqual(result['issue'], {})
         
+        # Test loading the context from a file
+        result = extract_context_for_issue_solving(self.context_file_path, 123)
+        self.assertEqual(result, _extract_from_dict(self.sample_context, 123))
+        
         # Test with invalid file path
         result = extract_context_for_issue_solving('non_existent_file.json', 123)
         self.assertEqual(result['repository'], '')
         self.assertEqual(result['issue'], {})
         self.assertEqual(result['code_snippets'], [])
 
+    def test_loaded_context_copies(self):
+        """Test that changing a loaded context doesn't affect later loads of the file."""
+        context = load_context(self.context_file_path)
+        context['issues'][0]['title'] = 'Changed'
+        self.assertEqual(load_context(self.context_file_path), self.sample_context)
+        
+        result = extract_context_for_issue_solving(self.context_file_path, 123)
+        result['issue']['title'] = 'Changed'
+        result['error_logs'].append('Another error')
+        self.assertEqual(
+            extract_context_for_issue_solving(self.context_file_path, 123),
+            _extract_from_dict(self.sample_context, 123)
+        )
+
     def test_prepare_workflow_from_issue_solution(self):
         """Test preparing workflow from issue solution."""
         task_id = "task-123"
@@ -114,9 +143,7 @@ class TestIntegration(unittest.TestCase):
 
     def test_generate_requirements_from_context(self):
         """Test generating requirements from context."""
-        # Mock the open function to avoid writing to disk
-        with patch('builtins.open', mock_open()) as mock_file:
-            result = generate_requirements_from_context(self.context_file_path)
+        result = _requirements_from_dict(self.sample_context)
         
         # Verify the result
         self.assertIn('# Project Requirements', result)
@@ -126,6 +153,14 @@ class TestIntegration(unittest.TestCase):
         self.assertIn('## Code Structure', result)
         self.assertIn('src/app.py', result)
         
+        # Test loading the context from a file and writing REQUIREMENTS.md,
+        # mocking both so nothing is read from or written to disk
+        with patch('code_agent.core.integration._load_context', return_value=self.sample_context), \
+             patch('builtins.open', mock_open()) as mock_file:
+            self.assertEqual(generate_requirements_from_context(self.context_file_path), result)
+        mock_file.assert_called_once_with("REQUIREMENTS.md", 'w')
+        mock_file().write.assert_called_once_with(result)
+        
         # Test with exception
         with patch('builtins.open', side_effect=Exception("Test error")):
             result = generate_requirements_from_context(self.context_file_path)
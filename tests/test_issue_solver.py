@@ -3,49 +3,63 @@
 Test script for the issue_solver module
 """
 
-import os
-import sys
+import io
+import copy
 import json
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
-import tempfile
-from pathlib import Path
-
-# Add the parent directory to the path so we can import the module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import subprocess
+from unittest.mock import patch, Mock, mock_open
+from types import SimpleNamespace
 
 from code_agent.core.issue_solver import IssueContext, solve_issue
 
+# Contents of every file opened by find_relevant_code
+FILE_CONTENT = "test file content"
+
+# Search commands expected from find_relevant_code for ["keyword1", "keyword2"]
+EXPECTED_GREP_CMD = "grep -r --include=*.py --include=*.js --include=*.ts --include=*.jsx --include=*.tsx --include=*.go --include=*.java --include=*.rb -l -E 'keyword1|keyword2' ."
+EXPECTED_RG_CMD = "rg -l -g '*.py' -g '*.js' -g '*.ts' -g '*.jsx' -g '*.tsx' -g '*.go' -g '*.java' -g '*.rb' -e 'keyword1|keyword2' ."
+
+# Issue returned by the GitHub CLI, serialized once at import
+ISSUE_DATA = {
+    "title": "Test Issue",
+    "body": "This is a test issue",
+    "labels": ["bug"],
+    "assignees": ["user1"],
+    "comments": []
+}
+ISSUE_JSON = json.dumps(ISSUE_DATA)
+
 
 class TestIssueContext(unittest.TestCase):
     """Test cases for the IssueContext class"""
 
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by all tests"""
+        # A real, read-only process result is cheaper than a MagicMock and
+        # only has the attributes subprocess.run actually returns
+        cls.completed_process = subprocess.CompletedProcess(
+            args="test command", returncode=0, stdout="test output", stderr=""
+        )
+
     def setUp(self):
         """Set up test fixtures"""
         self.context = IssueContext()
-        # Create a temporary directory for testing
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_repo_path = Path(self.temp_dir.name)
-
-    def tearDown(self):
-        """Clean up test fixtures"""
-        self.temp_dir.cleanup()
 
     @patch('code_agent.core.issue_solver.subprocess.run')
     def test_run_command(self, mock_subprocess_run):
         """Test the _run_command method"""
         # Setup mock
-        mock_process = MagicMock()
-        mock_process.stdout = "test output"
-        mock_subprocess_run.return_value = mock_process
+        mock_subprocess_run.return_value = self.completed_process
 
         # Run the method
         result = self.context._run_command("test command")
 
         # Assertions
         mock_subprocess_run.assert_called_once_with(
-            "test command",
-            shell=True,
+            ["test", "command"],
+            shell=False,
             check=False,
             stdout=-1,  # subprocess.PIPE
             stderr=-1,  # subprocess.PIPE
@@ -53,11 +67,44 @@ class TestIssueContext(unittest.TestCase):
         )
         self.assertEqual(result, "test output")
 
+    @patch('code_agent.core.issue_solver.subprocess.run')
+    def test_run_command_with_shell_syntax(self, mock_subprocess_run):
+        """Test that _run_command hands commands with shell syntax to the shell"""
+        # Setup mock
+        mock_subprocess_run.return_value = self.completed_process
+
+        # Run the method
+        self.context._run_command("find . -name '*.log' | head")
+
+        # Assertions
+        mock_subprocess_run.assert_called_once_with(
+            "find . -name '*.log' | head",
+            shell=True,
+            check=False,
+            stdout=-1,  # subprocess.PIPE
+            stderr=-1,  # subprocess.PIPE
+            text=True
+        )
+
+    @patch('builtins.print')
+    @patch('code_agent.core.issue_solver.subprocess.run')
+    def test_run_command_missing_executable(self, mock_subprocess_run, mock_print):
+        """Test that _run_command returns no output when the executable is missing"""
+        # Setup mock
+        mock_subprocess_run.side_effect = FileNotFoundError("No such file or directory: 'gh'")
+
+        # Run the method
+        result = self.context._run_command("gh issue view 123")
+
+        # Assertions
+        self.assertEqual(result, "")
+        mock_print.assert_not_called()
+
     @patch('code_agent.core.issue_solver.subprocess.run')
     def test_command_exists_true(self, mock_subprocess_run):
         """Test the _command_exists method when command exists"""
         # Setup mock to return success
-        mock_subprocess_run.return_value.returncode = 0
+        mock_subprocess_run.return_value = self.completed_process
 
         # Run the method
         result = self.context._command_exists("existing_command")
@@ -78,14 +125,13 @@ class TestIssueContext(unittest.TestCase):
         # Assertions
         self.assertFalse(result)
 
-    @patch('code_agent.core.issue_solver.IssueContext._run_command')
-    def test_collect_repo_info(self, mock_run_command):
+    def test_collect_repo_info(self):
         """Test the collect_repo_info method"""
         # Setup mocks
-        mock_run_command.side_effect = [
+        mock_run_command = self.context._run_command = Mock(side_effect=[
             "https://github.com/Zeeeepa/Code_agent.git",  # git config
             "main"  # git rev-parse
-        ]
+        ])
 
         # Run the method
         self.context.collect_repo_info()
@@ -95,34 +141,24 @@ class TestIssueContext(unittest.TestCase):
         self.assertEqual(self.context.context["branch"], "main")
         self.assertEqual(mock_run_command.call_count, 2)
 
-    @patch('code_agent.core.issue_solver.IssueContext._command_exists')
-    @patch('code_agent.core.issue_solver.IssueContext._run_command')
-    def test_collect_issue_info_with_gh(self, mock_run_command, mock_command_exists):
+    def test_collect_issue_info_with_gh(self):
         """Test the collect_issue_info method with GitHub CLI available"""
         # Setup mocks
-        mock_command_exists.return_value = True
-        issue_data = {
-            "title": "Test Issue",
-            "body": "This is a test issue",
-            "labels": ["bug"],
-            "assignees": ["user1"],
-            "comments": []
-        }
-        mock_run_command.return_value = json.dumps(issue_data)
+        mock_command_exists = self.context._command_exists = Mock(return_value=True)
+        mock_run_command = self.context._run_command = Mock(return_value=ISSUE_JSON)
 
         # Run the method
         self.context.collect_issue_info(123)
 
         # Assertions
-        self.assertEqual(self.context.context["issue"], issue_data)
+        self.assertEqual(self.context.context["issue"], ISSUE_DATA)
         mock_command_exists.assert_called_once_with("gh")
         mock_run_command.assert_called_once_with("gh issue view 123 --json title,body,labels,assignees,comments")
 
-    @patch('code_agent.core.issue_solver.IssueContext._command_exists')
-    def test_collect_issue_info_without_gh(self, mock_command_exists):
+    def test_collect_issue_info_without_gh(self):
         """Test the collect_issue_info method without GitHub CLI"""
         # Setup mocks
-        mock_command_exists.return_value = False
+        mock_command_exists = self.context._command_exists = Mock(return_value=False)
 
         # Run the method
         self.context.collect_issue_info(123)
@@ -136,12 +172,12 @@ class TestIssueContext(unittest.TestCase):
         self.assertEqual(self.context.context["issue"], expected_issue)
         mock_command_exists.assert_called_once_with("gh")
 
-    @patch('code_agent.core.issue_solver.IssueContext._run_command')
-    @patch('builtins.open', new_callable=mock_open, read_data="test file content")
-    def test_find_relevant_code(self, mock_file_open, mock_run_command):
+    @patch('code_agent.core.issue_solver._has_ripgrep', return_value=False)
+    @patch('builtins.open', side_effect=lambda *args, **kwargs: io.StringIO(FILE_CONTENT))
+    def test_find_relevant_code(self, mock_file_open, mock_has_ripgrep):
         """Test the find_relevant_code method"""
         # Setup mocks
-        mock_run_command.return_value = "file1.py\nfile2.py\n"
+        mock_run_command = self.context._run_command = Mock(return_value="file1.py\nfile2.py\n")
 
         # Run the method
         self.context.find_relevant_code(["keyword1", "keyword2"])
@@ -149,23 +185,36 @@ class TestIssueContext(unittest.TestCase):
         # Assertions
         self.assertEqual(len(self.context.context["code_snippets"]), 2)
         self.assertEqual(self.context.context["code_snippets"][0]["file"], "file1.py")
-        self.assertEqual(self.context.context["code_snippets"][0]["content"], "test file content")
+        self.assertEqual(self.context.context["code_snippets"][0]["content"], FILE_CONTENT)
         self.assertEqual(self.context.context["code_snippets"][1]["file"], "file2.py")
-        self.assertEqual(self.context.context["code_snippets"][1]["content"], "test file content")
+        self.assertEqual(self.context.context["code_snippets"][1]["content"], FILE_CONTENT)
 
         # Check that grep command was constructed correctly
-        expected_grep_cmd = "grep -r --include=*.py --include=*.js --include=*.ts --include=*.jsx --include=*.tsx --include=*.go --include=*.java --include=*.rb -l -E 'keyword1|keyword2' ."
-        mock_run_command.assert_called_once_with(expected_grep_cmd)
+        mock_run_command.assert_called_once_with(EXPECTED_GREP_CMD)
+
+    @patch('code_agent.core.issue_solver._has_ripgrep', return_value=True)
+    @patch('builtins.open', side_effect=lambda *args, **kwargs: io.StringIO(FILE_CONTENT))
+    def test_find_relevant_code_with_ripgrep(self, mock_file_open, mock_has_ripgrep):
+        """Test the find_relevant_code method with ripgrep available"""
+        # Setup mocks
+        mock_run_command = self.context._run_command = Mock(return_value="./file1.py\n")
+
+        # Run the method
+        self.context.find_relevant_code(["keyword1", "keyword2"])
+
+        # Assertions
+        self.assertEqual(len(self.context.context["code_snippets"]), 1)
+        self.assertEqual(self.context.context["code_snippets"][0]["file"], "./file1.py")
+        mock_has_ripgrep.assert_called_once_with()
+        mock_run_command.assert_called_once_with(EXPECTED_RG_CMD)
 
-    @patch('code_agent.core.issue_solver.IssueContext._run_command')
-    @patch('builtins.open', new_callable=mock_open, read_data="ERROR: test error")
-    def test_find_error_logs(self, mock_file_open, mock_run_command):
+    def test_find_error_logs(self):
         """Test the find_error_logs method"""
         # Setup mocks
-        mock_run_command.side_effect = [
+        self.context._run_command = Mock(side_effect=[
             "log1.log\nlog2.log\n",  # find command
             "ERROR: test error\n"  # grep command for log1.log
-        ]
+        ])
 
         # Run the method
         self.context.find_error_logs()
@@ -175,6 +224,36 @@ class TestIssueContext(unittest.TestCase):
         self.assertEqual(self.context.context["error_logs"][0]["file"], "log1.log")
         self.assertEqual(self.context.context["error_logs"][0]["content"], "ERROR: test error\n")
 
+    @patch('code_agent.core.issue_solver.json.dump')
+    @patch('builtins.open', new_callable=mock_open)
+    def test_save_context(self, mock_file_open, mock_json_dump):
+        """Test the save_context method"""
+        # Setup test data
+        self.context.context = {"test": "data"}
+
+        # Run the method
+        self.context.save_context("test_context.json")
+
+        # Assertions
+        mock_file_open.assert_called_once_with("test_context.json", 'w', encoding='utf-8')
+        # Check that json.dump was called with the correct data and the opened file
+        mock_json_dump.assert_called_once_with({"test": "data"}, mock_file_open(), indent=2)
+
+
+class TestIssueContextPure(unittest.TestCase):
+    """Test cases for the IssueContext methods that only work on the context dict"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by all tests"""
+        cls.proto = IssueContext()
+
+    def setUp(self):
+        """Set up test fixtures"""
+        # Copy the shared instance and give it its own context dict
+        self.context = copy.copy(self.proto)
+        self.context.context = copy.deepcopy(self.proto.context)
+
     def test_extract_keywords(self):
         """Test the extract_keywords method"""
         # Setup test data
@@ -191,8 +270,7 @@ class TestIssueContext(unittest.TestCase):
             "authentication", "login", "module", "authenticationerror", "invalid", "credentials", "authenticate_user"
         ]
         # Check that all expected keywords are in the result (order may vary)
-        for keyword in expected_keywords:
-            self.assertIn(keyword, keywords)
+        self.assertLessEqual(set(expected_keywords), set(keywords))
 
     def test_create_prompt_bug(self):
         """Test the create_prompt method for bug task"""
@@ -256,22 +334,6 @@ class TestIssueContext(unittest.TestCase):
         self.assertIn("Issue: #124 - Add user profile page", prompt)
         self.assertIn("We need to add a user profile page", prompt)
 
-    @patch('builtins.open', new_callable=mock_open)
-    def test_save_context(self, mock_file_open):
-        """Test the save_context method"""
-        # Setup test data
-        self.context.context = {"test": "data"}
-
-        # Run the method
-        self.context.save_context("test_context.json")
-
-        # Assertions
-        mock_file_open.assert_called_once_with("test_context.json", 'w', encoding='utf-8')
-        mock_file_open().write.assert_called_once()
-        # Check that json.dump was called with the correct data
-        written_data = mock_file_open().write.call_args[0][0]
-        self.assertIn('"test": "data"', written_data)
-
 
 class TestSolveIssue(unittest.TestCase):
     """Test cases for the solve_issue function"""
@@ -282,15 +344,13 @@ class TestSolveIssue(unittest.TestCase):
     def test_solve_issue_success(self, mock_file_open, MockIssueContext, MockAgent):
         """Test the solve_issue function with successful execution"""
         # Setup mocks
-        mock_context = MagicMock()
+        mock_context = Mock(spec=IssueContext)
         mock_context.extract_keywords.return_value = ["keyword1", "keyword2"]
         mock_context.create_prompt.return_value = "Test prompt"
         MockIssueContext.return_value = mock_context
 
-        mock_agent = MagicMock()
-        mock_task = MagicMock()
-        mock_task.id = "task123"
-        mock_task.status = "completed"
+        mock_task = SimpleNamespace(id="task123", status="completed", refresh=Mock())
+        mock_agent = Mock(spec=["run"])
         mock_agent.run.return_value = mock_task
         MockAgent.return_value = mock_agent
 
@@ -316,16 +376,13 @@ class TestSolveIssue(unittest.TestCase):
     def test_solve_issue_failure(self, mock_file_open, MockIssueContext, MockAgent):
         """Test the solve_issue function with failed execution"""
         # Setup mocks
-        mock_context = MagicMock()
+        mock_context = Mock(spec=IssueContext)
         mock_context.extract_keywords.return_value = ["keyword1", "keyword2"]
         mock_context.create_prompt.return_value = "Test prompt"
         MockIssueContext.return_value = mock_context
 
-        mock_agent = MagicMock()
-        mock_task = MagicMock()
-        mock_task.id = "task123"
-        mock_task.status = "failed"
-        mock_task.error = "Test error"
+        mock_task = SimpleNamespace(id="task123", status="failed", error="Test error", refresh=Mock())
+        mock_agent = Mock(spec=["run"])
         mock_agent.run.return_value = mock_task
         MockAgent.return_value = mock_agent
 
@@ -344,8 +401,3 @@ class TestSolveIssue(unittest.TestCase):
         MockAgent.assert_called_once_with(org_id="org123", token="token123")
         mock_agent.run.assert_called_once_with(prompt="Test prompt")
         mock_task.refresh.assert_called_once()
-
-
-if __name__ == "__main__":
-    unittest.main()
-
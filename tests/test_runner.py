@@ -3,36 +3,57 @@
 Test suite for the Code Agent Runner module
 """
 
-import os
-import sys
+import argparse
 import pytest
 from unittest.mock import patch, MagicMock
 from argparse import Namespace
 
-# Add the parent directory to sys.path to allow importing the code_agent module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
 from code_agent.runner import main
 
+# Issue mode credential sources: (org_id, token, env, expected_credentials)
+CREDENTIAL_CASES = [
+    pytest.param('test-org-id', 'test-token', {}, ('test-org-id', 'test-token'), id="args"),
+    pytest.param(None, None, {"CODEGEN_ORG_ID": "env-org-id", "CODEGEN_TOKEN": "env-token"},
+                 ('env-org-id', 'env-token'), id="env"),
+]
+
+# Modes handed over to another module: (args_fixture, target, argv)
+DISPATCH_CASES = [
+    pytest.param("mock_context_args", 'code_agent.core.context_manager.main',
+                 ['code_agent.runner', 'collect'], id="context"),
+    pytest.param("mock_workflow_args", 'code_agent.core.workflow.main',
+                 ['code_agent.runner'], id="workflow"),
+]
+
+@pytest.fixture
+def runner_mocks(monkeypatch):
+    """Fixture that replaces argument parsing with mocks for the duration of a test"""
+    mocks = MagicMock()
+    monkeypatch.setattr(argparse.ArgumentParser, 'parse_args', mocks.parse_args)
+    monkeypatch.setattr(argparse.ArgumentParser, 'parse_known_args', mocks.parse_known_args)
+    return mocks
+
 
 class TestRunner:
     """Test cases for the runner.py module"""
 
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
+    @pytest.mark.parametrize("org_id, token, env, expected_credentials", CREDENTIAL_CASES)
     @patch('code_agent.core.issue_solver.solve_issue')
-    def test_issue_mode_success(self, mock_solve_issue, mock_parse_known_args, mock_parse_args):
-        """Test the issue mode with successful execution"""
+    def test_issue_mode_success(self, mock_solve_issue, runner_mocks, monkeypatch,
+                                org_id, token, env, expected_credentials):
+        """Test the issue mode with successful execution, taking credentials from arguments or environment variables"""
         # Mock the arguments
         mock_args = Namespace(
             mode='issue',
             issue_number=123,
             task_type='bug',
-            org_id='test-org-id',
-            token='test-token'
+            org_id=org_id,
+            token=token
         )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        runner_mocks.parse_known_args.return_value = (mock_args, [])
+        runner_mocks.parse_args.return_value = mock_args
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
         
         # Mock the solve_issue function to return a task ID
         mock_solve_issue.return_value = 'task-123'
@@ -43,12 +64,10 @@ class TestRunner:
             mock_exit.assert_not_called()
         
         # Verify that solve_issue was called with the correct arguments
-        mock_solve_issue.assert_called_once_with(123, 'bug', 'test-org-id', 'test-token')
+        mock_solve_issue.assert_called_once_with(123, 'bug', *expected_credentials)
 
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
     @patch('code_agent.core.issue_solver.solve_issue')
-    def test_issue_mode_failure(self, mock_solve_issue, mock_parse_known_args, mock_parse_args):
+    def test_issue_mode_failure(self, mock_solve_issue, runner_mocks):
         """Test the issue mode with failed execution"""
         # Mock the arguments
         mock_args = Namespace(
@@ -58,8 +77,8 @@ class TestRunner:
             org_id='test-org-id',
             token='test-token'
         )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        runner_mocks.parse_known_args.return_value = (mock_args, [])
+        runner_mocks.parse_args.return_value = mock_args
         
         # Mock the solve_issue function to return None (failure)
         mock_solve_issue.return_value = None
@@ -69,9 +88,7 @@ class TestRunner:
             main()
             mock_exit.assert_called_once_with(1)
 
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
-    def test_issue_mode_missing_credentials(self, mock_parse_known_args, mock_parse_args):
+    def test_issue_mode_missing_credentials(self, runner_mocks, monkeypatch):
         """Test the issue mode with missing credentials"""
         # Mock the arguments with missing credentials
         mock_args = Namespace(
@@ -81,77 +98,41 @@ class TestRunner:
             org_id=None,
             token=None
         )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        runner_mocks.parse_known_args.return_value = (mock_args, [])
+        runner_mocks.parse_args.return_value = mock_args
         
-        # Ensure environment variables are not set
-        with patch.dict(os.environ, {}, clear=True):
-            # Call the main function
-            with patch('sys.exit') as mock_exit:
-                main()
-                mock_exit.assert_called_once_with(1)
-
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
-    @patch('code_agent.core.context_manager.main')
-    def test_context_mode(self, mock_context_main, mock_parse_known_args, mock_parse_args):
-        """Test the context mode"""
-        # Mock the arguments
-        mock_args = Namespace(
-            mode='context',
-            command='collect',
-            output='context.json',
-            issue=None,
-            pr=None,
-            max_files=20,
-            file_patterns=None,
-            exclude_patterns=None
-        )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        # Ensure the credential environment variables are not set
+        monkeypatch.delenv("CODEGEN_ORG_ID", raising=False)
+        monkeypatch.delenv("CODEGEN_TOKEN", raising=False)
         
         # Call the main function
-        with patch('sys.argv', ['code_agent.runner', 'collect']):
+        with patch('sys.exit') as mock_exit:
             main()
-        
-        # Verify that context_main was called
-        mock_context_main.assert_called_once()
-
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
-    @patch('code_agent.core.workflow.main')
-    def test_workflow_mode(self, mock_workflow_main, mock_parse_known_args, mock_parse_args):
-        """Test the workflow mode"""
+            mock_exit.assert_called_once_with(1)
+
+    @pytest.mark.parametrize("args_fixture, target, argv", DISPATCH_CASES)
+    def test_mode_dispatch(self, runner_mocks, request, args_fixture, target, argv):
+        """Test that the context and workflow modes hand over to their module's main function"""
         # Mock the arguments
-        mock_args = Namespace(
-            mode='workflow',
-            github_token='github-token',
-            ngrok_token='ngrok-token',
-            repo_name='owner/repo',
-            codegen_token='codegen-token',
-            codegen_org_id='codegen-org-id',
-            webhook_port=5000
-        )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        mock_args = request.getfixturevalue(args_fixture)
+        runner_mocks.parse_known_args.return_value = (mock_args, [])
+        runner_mocks.parse_args.return_value = mock_args
         
         # Call the main function
-        with patch('sys.argv', ['code_agent.runner']):
+        with patch(target) as mock_mode_main, patch('sys.argv', argv):
             main()
         
-        # Verify that workflow_main was called
-        mock_workflow_main.assert_called_once()
+        # Verify that the mode's main function was called
+        mock_mode_main.assert_called_once()
 
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
-    def test_invalid_mode(self, mock_parse_known_args, mock_parse_args):
+    def test_invalid_mode(self, runner_mocks):
         """Test with an invalid mode (should never happen due to argparse choices, but testing for completeness)"""
         # Mock the arguments with an invalid mode
         mock_args = Namespace(
             mode='invalid'
         )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        runner_mocks.parse_known_args.return_value = (mock_args, [])
+        runner_mocks.parse_args.return_value = mock_args
         
         # Call the main function
         with patch('sys.exit') as mock_exit:
@@ -159,10 +140,8 @@ class TestRunner:
             # The function should exit with an error
             assert mock_exit.called
 
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
     @patch('code_agent.core.issue_solver.solve_issue')
-    def test_exception_handling(self, mock_solve_issue, mock_parse_known_args, mock_parse_args):
+    def test_exception_handling(self, mock_solve_issue, runner_mocks):
         """Test exception handling in the main function"""
         # Mock the arguments
         mock_args = Namespace(
@@ -172,8 +151,8 @@ class TestRunner:
             org_id='test-org-id',
             token='test-token'
         )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
+        runner_mocks.parse_known_args.return_value = (mock_args, [])
+        runner_mocks.parse_args.return_value = mock_args
         
         # Mock the solve_issue function to raise an exception
         mock_solve_issue.side_effect = Exception("Test exception")
@@ -185,34 +164,6 @@ class TestRunner:
                 mock_exit.assert_called_once_with(1)
                 mock_traceback.assert_called_once()
 
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_args')
-    @patch('code_agent.runner.argparse.ArgumentParser.parse_known_args')
-    @patch.dict(os.environ, {"CODEGEN_ORG_ID": "env-org-id", "CODEGEN_TOKEN": "env-token"})
-    @patch('code_agent.core.issue_solver.solve_issue')
-    def test_issue_mode_env_credentials(self, mock_solve_issue, mock_parse_known_args, mock_parse_args):
-        """Test the issue mode with credentials from environment variables"""
-        # Mock the arguments with missing credentials (should be taken from env)
-        mock_args = Namespace(
-            mode='issue',
-            issue_number=123,
-            task_type='bug',
-            org_id=None,
-            token=None
-        )
-        mock_parse_known_args.return_value = (mock_args, [])
-        mock_parse_args.return_value = mock_args
-        
-        # Mock the solve_issue function to return a task ID
-        mock_solve_issue.return_value = 'task-123'
-        
-        # Call the main function
-        with patch('sys.exit') as mock_exit:
-            main()
-            mock_exit.assert_not_called()
-        
-        # Verify that solve_issue was called with the correct arguments from env vars
-        mock_solve_issue.assert_called_once_with(123, 'bug', 'env-org-id', 'env-token')
-
 
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
@@ -4,55 +4,43 @@ Test suite for the Code Agent Workflow Manager
 """
 
 import os
-import sys
-import json
 import unittest
-from unittest.mock import patch, MagicMock, mock_open
-import tempfile
-import threading
-import time
-from pathlib import Path
-
-# Add the parent directory to the Python path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from unittest.mock import patch, call, Mock, DEFAULT
+from types import SimpleNamespace
 
 from code_agent.core.workflow import (
     Configuration, 
     GitHubManager, 
     NgrokManager, 
     CodeGenManager, 
-    DeploymentManager, 
-    WebhookServer, 
     WorkflowManager
 )
 
+# Read-only GitHub objects returned by the mocked repository in commit and PR tests
+COMMIT_FIXTURE = SimpleNamespace(sha='commit_sha', commit=SimpleNamespace(tree=object()))
+BLOB_FIXTURE = SimpleNamespace(sha='blob_sha')
+TREE_FIXTURE = SimpleNamespace(sha='tree_sha')
+NEW_COMMIT_FIXTURE = SimpleNamespace(sha='new_commit_sha')
+PR_FIXTURE = SimpleNamespace(number=123)
+
 
 class TestConfiguration(unittest.TestCase):
     """Test cases for the Configuration class."""
 
+    @classmethod
+    def setUpClass(cls):
+        """Create a default configuration shared by the tests that only read it."""
+        cls.default_config = Configuration()
+
     def setUp(self):
         """Set up test environment before each test."""
         # Create a fresh config instance for each test
         self.config = Configuration()
-        
-        # Save original environment variables to restore later
-        self.original_env = os.environ.copy()
-        
-        # Clear relevant environment variables for testing
-        for var in ['GITHUB_TOKEN', 'NGROK_TOKEN', 'REPO_NAME', 
-                    'CODEGEN_TOKEN', 'CODEGEN_ORG_ID']:
-            if var in os.environ:
-                del os.environ[var]
-
-    def tearDown(self):
-        """Clean up after each test."""
-        # Restore original environment variables
-        os.environ.clear()
-        os.environ.update(self.original_env)
 
     def test_default_initialization(self):
         """Test that the config initializes with default values."""
-        config = Configuration()
+        config = self.default_config
         
         # Check default values
         self.assertEqual(config.github_token, "")
@@ -69,15 +57,16 @@ class TestConfiguration(unittest.TestCase):
 
     def test_load_from_env(self):
         """Test loading configuration from environment variables."""
-        # Set environment variables
-        os.environ['GITHUB_TOKEN'] = 'test_github_token'
-        os.environ['NGROK_TOKEN'] = 'test_ngrok_token'
-        os.environ['REPO_NAME'] = 'test/repo'
-        os.environ['CODEGEN_TOKEN'] = 'test_codegen_token'
-        os.environ['CODEGEN_ORG_ID'] = 'test_codegen_org_id'
-        
-        # Load from environment
-        self.config.load_from_env()
+        # Set environment variables for the duration of the load
+        with patch.dict(os.environ, {
+            'GITHUB_TOKEN': 'test_github_token',
+            'NGROK_TOKEN': 'test_ngrok_token',
+            'REPO_NAME': 'test/repo',
+            'CODEGEN_TOKEN': 'test_codegen_token',
+            'CODEGEN_ORG_ID': 'test_codegen_org_id'
+        }):
+            # Load from environment
+            self.config.load_from_env()
         
         # Check that values were loaded from environment
         self.assertEqual(self.config.github_token, 'test_github_token')
@@ -89,13 +78,14 @@ class TestConfiguration(unittest.TestCase):
     def test_load_from_args(self):
         """Test loading configuration from command line arguments."""
         # Create mock args
-        args = MagicMock()
-        args.github_token = 'args_github_token'
-        args.ngrok_token = 'args_ngrok_token'
-        args.repo_name = 'args/repo'
-        args.codegen_token = 'args_codegen_token'
-        args.codegen_org_id = 'args_codegen_org_id'
-        args.webhook_port = 8080
+        args = SimpleNamespace(
+            github_token='args_github_token',
+            ngrok_token='args_ngrok_token',
+            repo_name='args/repo',
+            codegen_token='args_codegen_token',
+            codegen_org_id='args_codegen_org_id',
+            webhook_port=8080
+        )
         
         # Load from args
         self.config.load_from_args(args)
@@ -112,12 +102,13 @@ class TestConfiguration(unittest.TestCase):
         """Test configuration validation."""
         # Empty config should have validation errors
         errors = self.config.validate()
-        self.assertEqual(len(errors), 5)
-        self.assertIn("GitHub token is not provided", errors)
-        self.assertIn("ngrok token is not provided", errors)
-        self.assertIn("Repository name is not provided", errors)
-        self.assertIn("CodeGen token is not provided", errors)
-        self.assertIn("CodeGen organization ID is not provided", errors)
+        self.assertCountEqual(errors, [
+            "GitHub token is not provided",
+            "ngrok token is not provided",
+            "Repository name is not provided",
+            "CodeGen token is not provided",
+            "CodeGen organization ID is not provided",
+        ])
         
         # Set required values
         self.config.github_token = 'valid_github_token'
@@ -130,101 +121,121 @@ class TestConfiguration(unittest.TestCase):
         errors = self.config.validate()
         self.assertEqual(len(errors), 0)
 
+    def test_manager_config_values(self):
+        """Test that the configs used by the manager tests only hold real Configuration fields."""
+        # The manager tests pass SimpleNamespace configs, so check their field names once here
+        config_fields = set(vars(self.default_config))
+        for config_values in (GITHUB_CONFIG_VALUES, TestNgrokManager.CONFIG_VALUES,
+                              TestCodeGenManager.CONFIG_VALUES, TestWorkflowManager.CONFIG_VALUES):
+            self.assertLessEqual(set(config_values), config_fields)
 
-class TestGitHubManager(unittest.TestCase):
-    """Test cases for the GitHubManager class."""
 
-    def setUp(self):
-        """Set up test environment before each test."""
-        # Create a mock configuration
-        self.config = MagicMock()
-        self.config.github_token = 'mock_github_token'
-        self.config.repo_name = 'mock/repo'
-        self.config.requirements_path = 'REQUIREMENTS.md'
-        
-        # Create mock Github client and repository
-        self.mock_github = MagicMock()
-        self.mock_repo = MagicMock()
-        self.mock_github.get_repo.return_value = self.mock_repo
-        
-        # Patch the Github class
-        self.github_patcher = patch('code_agent.core.workflow.Github', return_value=self.mock_github)
-        self.mock_github_class = self.github_patcher.start()
-        
-        # Create the GitHubManager instance
-        self.github_manager = GitHubManager(self.config)
+# Configuration values read by GitHubManager
+GITHUB_CONFIG_VALUES = {
+    'github_token': 'mock_github_token',
+    'repo_name': 'mock/repo',
+    'requirements_path': 'REQUIREMENTS.md',
+}
 
-    def tearDown(self):
-        """Clean up after each test."""
-        self.github_patcher.stop()
 
-    def test_initialization(self):
+@pytest.fixture(scope="class")
+def mock_github_class():
+    """Fixture that patches the Github class once for a test class"""
+    with patch('code_agent.core.workflow.Github', new_callable=Mock) as mock_class:
+        yield mock_class
+
+
+@pytest.fixture
+def github_config():
+    """Fixture for a configuration holding only the values GitHubManager reads"""
+    return SimpleNamespace(**GITHUB_CONFIG_VALUES)
+
+
+@pytest.fixture
+def github_manager(mock_github_class, github_config):
+    """Fixture for a GitHubManager connected to a fresh mock repository"""
+    # Start from a fresh Github mock; the client and repository are its child mocks
+    mock_github_class.reset_mock(return_value=True, side_effect=True)
+    return GitHubManager(github_config)
+
+
+@pytest.fixture
+def mock_repo(github_manager):
+    """Fixture for the mock repository behind github_manager"""
+    return github_manager.repo
+
+
+class TestGitHubManager:
+    """Test cases for the GitHubManager class."""
+
+    def test_initialization(self, github_manager, mock_github_class, github_config):
         """Test that the GitHubManager initializes correctly."""
         # Check that the Github client was created with the token
-        self.mock_github_class.assert_called_once_with('mock_github_token')
+        mock_github_class.assert_called_once_with('mock_github_token')
         
         # Check that the repo was retrieved
-        self.mock_github.get_repo.assert_called_once_with('mock/repo')
+        mock_github_class.return_value.get_repo.assert_called_once_with('mock/repo')
         
         # Check that the manager has the correct attributes
-        self.assertEqual(self.github_manager.config, self.config)
-        self.assertEqual(self.github_manager.github_client, self.mock_github)
-        self.assertEqual(self.github_manager.repo, self.mock_repo)
+        assert github_manager.config == github_config
+        assert github_manager.github_client == mock_github_class.return_value
+        assert github_manager.repo == mock_github_class.return_value.get_repo.return_value
 
-    def test_get_requirements(self):
+    def test_get_requirements(self, github_manager, mock_repo):
         """Test fetching requirements from the repository."""
         # Mock the get_contents method
-        mock_content_file = MagicMock()
+        mock_content_file = Mock()
         mock_content_file.decoded_content = b'# Requirements\n- Task 1\n- Task 2'
-        self.mock_repo.get_contents.return_value = mock_content_file
+        mock_repo.get_contents.return_value = mock_content_file
         
         # Get requirements
-        requirements = self.github_manager.get_requirements()
+        requirements = github_manager.get_requirements()
         
         # Check that get_contents was called with the correct path
-        self.mock_repo.get_contents.assert_called_once_with('REQUIREMENTS.md')
+        mock_repo.get_contents.assert_called_once_with('REQUIREMENTS.md')
         
         # Check that the requirements were decoded correctly
-        self.assertEqual(requirements, '# Requirements\n- Task 1\n- Task 2')
-        
-        # Test error handling
-        self.mock_repo.get_contents.side_effect = Exception("API error")
-        requirements = self.github_manager.get_requirements()
-        self.assertEqual(requirements, "")
+        assert requirements == '# Requirements\n- Task 1\n- Task 2'
 
-    def test_create_branch(self):
+    def test_get_requirements_api_error(self, github_manager, mock_repo):
+        """Test that fetching requirements returns an empty string when the API raises."""
+        mock_repo.get_contents.side_effect = Exception("API error")
+        requirements = github_manager.get_requirements()
+        assert requirements == ""
+
+    def test_create_branch(self, github_manager, mock_repo):
         """Test creating a branch in the repository."""
         # Mock the get_git_ref and create_git_ref methods
-        mock_ref = MagicMock()
+        mock_ref = Mock()
         mock_ref.object.sha = 'base_commit_sha'
-        self.mock_repo.get_git_ref.return_value = mock_ref
+        mock_repo.get_git_ref.return_value = mock_ref
         
         # Create branch
-        result = self.github_manager.create_branch('new-branch', 'main')
+        result = github_manager.create_branch('new-branch', 'main')
         
         # Check that the methods were called correctly
-        self.mock_repo.get_git_ref.assert_called_once_with('heads/main')
-        self.mock_repo.create_git_ref.assert_called_once_with(
+        mock_repo.get_git_ref.assert_called_once_with('heads/main')
+        mock_repo.create_git_ref.assert_called_once_with(
             'refs/heads/new-branch', 'base_commit_sha'
         )
         
         # Check that the result is True
-        self.assertTrue(result)
-        
-        # Test error handling
-        self.mock_repo.get_git_ref.side_effect = Exception("API error")
-        result = self.github_manager.create_branch('error-branch', 'main')
-        self.assertFalse(result)
+        assert result
+
+    def test_create_branch_api_error(self, github_manager, mock_repo):
+        """Test that creating a branch reports failure when the API raises."""
+        mock_repo.get_git_ref.side_effect = Exception("API error")
+        result = github_manager.create_branch('error-branch', 'main')
+        assert not result
+        mock_repo.create_git_ref.assert_not_called()
 
-    def test_create_pr(self):
+    def test_create_pr(self, github_manager, mock_repo):
         """Test creating a pull request in the repository."""
         # Mock the create_pull method
-        mock_pr = MagicMock()
-        mock_pr.number = 123
-        self.mock_repo.create_pull.return_value = mock_pr
+        mock_repo.create_pull.return_value = PR_FIXTURE
         
         # Create PR
-        pr = self.github_manager.create_pr(
+        pr = github_manager.create_pr(
             title='Test PR',
             body='PR description',
             head='feature-branch',
@@ -232,7 +243,7 @@ class TestGitHubManager(unittest.TestCase):
         )
         
         # Check that create_pull was called with the correct arguments
-        self.mock_repo.create_pull.assert_called_once_with(
+        mock_repo.create_pull.assert_called_once_with(
             title='Test PR',
             body='PR description',
             head='feature-branch',
@@ -240,116 +251,121 @@ class TestGitHubManager(unittest.TestCase):
         )
         
         # Check that the PR was returned
-        self.assertEqual(pr, mock_pr)
-        
-        # Test error handling
-        self.mock_repo.create_pull.side_effect = Exception("API error")
-        pr = self.github_manager.create_pr(
+        assert pr is PR_FIXTURE
+
+    def test_create_pr_api_error(self, github_manager, mock_repo):
+        """Test that creating a pull request returns None when the API raises."""
+        mock_repo.create_pull.side_effect = Exception("API error")
+        pr = github_manager.create_pr(
             title='Error PR',
             body='PR description',
             head='error-branch',
             base='main'
         )
-        self.assertIsNone(pr)
+        assert pr is None
 
-    def test_get_pr(self):
+    def test_get_pr(self, github_manager, mock_repo):
         """Test getting a pull request by number."""
         # Mock the get_pull method
-        mock_pr = MagicMock()
-        mock_pr.number = 123
-        self.mock_repo.get_pull.return_value = mock_pr
+        mock_repo.get_pull.return_value = PR_FIXTURE
         
         # Get PR
-        pr = self.github_manager.get_pr(123)
+        pr = github_manager.get_pr(123)
         
         # Check that get_pull was called with the correct number
-        self.mock_repo.get_pull.assert_called_once_with(123)
+        mock_repo.get_pull.assert_called_once_with(123)
         
         # Check that the PR was returned
-        self.assertEqual(pr, mock_pr)
+        assert pr is PR_FIXTURE
         
         # Test error handling
-        self.mock_repo.get_pull.side_effect = Exception("API error")
-        pr = self.github_manager.get_pr(456)
-        self.assertIsNone(pr)
+        mock_repo.get_pull.side_effect = Exception("API error")
+        pr = github_manager.get_pr(456)
+        assert pr is None
 
-    def test_merge_pr(self):
+    def test_merge_pr(self, github_manager, mock_repo):
         """Test merging a pull request."""
         # Mock the PR and its merge method
-        mock_pr = MagicMock()
+        mock_pr = Mock()
         mock_pr.number = 123
-        mock_pr.merge.return_value = MagicMock()
+        mock_pr.merge.return_value = Mock()
         
         # Merge PR
-        result = self.github_manager.merge_pr(mock_pr)
+        result = github_manager.merge_pr(mock_pr)
         
         # Check that merge was called with the correct method
         mock_pr.merge.assert_called_once_with(merge_method="squash")
         
         # Check that the result is True
-        self.assertTrue(result)
+        assert result
         
         # Test error handling
         mock_pr.merge.side_effect = Exception("API error")
-        result = self.github_manager.merge_pr(mock_pr)
-        self.assertFalse(result)
+        result = github_manager.merge_pr(mock_pr)
+        assert not result
 
-    def test_create_commit(self):
+    def test_create_commit(self, github_manager, mock_repo):
         """Test creating a commit with changes."""
-        # Mock the necessary methods
-        mock_ref = MagicMock()
-        mock_commit = MagicMock()
-        mock_commit.sha = 'commit_sha'
-        mock_commit.commit.tree = MagicMock()
-        
-        self.mock_repo.get_git_ref.return_value = mock_ref
-        self.mock_repo.get_commit.return_value = mock_commit
-        self.mock_repo.create_git_blob.return_value = MagicMock(sha='blob_sha')
-        self.mock_repo.create_git_tree.return_value = MagicMock(sha='tree_sha')
-        self.mock_repo.get_git_commit.return_value = MagicMock()
-        self.mock_repo.create_git_commit.return_value = MagicMock(sha='new_commit_sha')
+        # Mock the necessary methods; only the branch ref needs call tracking
+        mock_ref = Mock()
+        mock_ref.object.sha = 'head_sha'
+        parent_commit = object()
+        
+        mock_repo.get_git_ref.return_value = mock_ref
+        mock_repo.get_commit.return_value = COMMIT_FIXTURE
+        mock_repo.create_git_blob.return_value = BLOB_FIXTURE
+        mock_repo.create_git_tree.return_value = TREE_FIXTURE
+        mock_repo.get_git_commit.return_value = parent_commit
+        mock_repo.create_git_commit.return_value = NEW_COMMIT_FIXTURE
         
         # Create commit
-        result = self.github_manager.create_commit(
+        result = github_manager.create_commit(
             branch='feature-branch',
             message='Test commit',
             changes={'file.py': 'print("Hello, World!")'}
         )
         
-        # Check that the methods were called correctly
-        self.mock_repo.get_git_ref.assert_called_once_with('heads/feature-branch')
-        self.mock_repo.get_commit.assert_called_once()
-        self.mock_repo.create_git_blob.assert_called_once_with('print("Hello, World!")', 'utf-8')
-        self.mock_repo.create_git_tree.assert_called_once()
-        self.mock_repo.get_git_commit.assert_called_once_with('commit_sha')
-        self.mock_repo.create_git_commit.assert_called_once()
-        mock_ref.edit.assert_called_once()
+        # Check the whole sequence of repository calls, including the ref update
+        assert mock_repo.mock_calls == [
+            call.get_git_ref('heads/feature-branch'),
+            call.get_commit('head_sha'),
+            call.create_git_blob('print("Hello, World!")', 'utf-8'),
+            call.create_git_tree(
+                [{'path': 'file.py', 'mode': '100644', 'type': 'blob', 'sha': 'blob_sha'}],
+                COMMIT_FIXTURE.commit.tree
+            ),
+            call.get_git_commit('commit_sha'),
+            call.create_git_commit('Test commit', TREE_FIXTURE, [parent_commit]),
+            call.get_git_ref().edit('new_commit_sha'),
+        ]
         
         # Check that the result is True
-        self.assertTrue(result)
-        
-        # Test error handling
-        self.mock_repo.get_git_ref.side_effect = Exception("API error")
-        result = self.github_manager.create_commit(
+        assert result
+
+    def test_create_commit_api_error(self, github_manager, mock_repo):
+        """Test that creating a commit reports failure when the API raises."""
+        mock_repo.get_git_ref.side_effect = Exception("API error")
+        result = github_manager.create_commit(
             branch='error-branch',
             message='Error commit',
             changes={'file.py': 'print("Error")'}
         )
-        self.assertFalse(result)
+        assert not result
+        mock_repo.create_git_commit.assert_not_called()
 
-    def test_update_requirements(self):
+    def test_update_requirements(self, github_manager, mock_repo):
         """Test updating the requirements file."""
         # Mock the get_contents and update_file methods
-        mock_content_file = MagicMock()
+        mock_content_file = Mock()
         mock_content_file.sha = 'file_sha'
-        self.mock_repo.get_contents.return_value = mock_content_file
+        mock_repo.get_contents.return_value = mock_content_file
         
         # Update requirements
-        result = self.github_manager.update_requirements('# Updated Requirements\n- Task 1 (done)\n- Task 2')
+        result = github_manager.update_requirements('# Updated Requirements\n- Task 1 (done)\n- Task 2')
         
         # Check that the methods were called correctly
-        self.mock_repo.get_contents.assert_called_once_with('REQUIREMENTS.md')
-        self.mock_repo.update_file.assert_called_once_with(
+        mock_repo.get_contents.assert_called_once_with('REQUIREMENTS.md')
+        mock_repo.update_file.assert_called_once_with(
             path='REQUIREMENTS.md',
             message='Update requirements progress [ci skip]',
             content='# Updated Requirements\n- Task 1 (done)\n- Task 2',
@@ -357,24 +373,24 @@ class TestGitHubManager(unittest.TestCase):
         )
         
         # Check that the result is True
-        self.assertTrue(result)
+        assert result
         
         # Test error handling
-        self.mock_repo.get_contents.side_effect = Exception("API error")
-        result = self.github_manager.update_requirements('# Error')
-        self.assertFalse(result)
+        mock_repo.get_contents.side_effect = Exception("API error")
+        result = github_manager.update_requirements('# Error')
+        assert not result
 
-    def test_set_webhook(self):
+    def test_set_webhook(self, github_manager, mock_repo):
         """Test setting a webhook on the repository."""
         # Mock the get_hooks and create_hook methods
-        self.mock_repo.get_hooks.return_value = []
+        mock_repo.get_hooks.return_value = []
         
         # Set webhook
-        result = self.github_manager.set_webhook('https://example.com/webhook')
+        result = github_manager.set_webhook('https://example.com/webhook')
         
         # Check that the methods were called correctly
-        self.mock_repo.get_hooks.assert_called_once()
-        self.mock_repo.create_hook.assert_called_once_with(
+        mock_repo.get_hooks.assert_called_once()
+        mock_repo.create_hook.assert_called_once_with(
             name='web',
             config={
                 'url': 'https://example.com/webhook',
@@ -386,56 +402,67 @@ class TestGitHubManager(unittest.TestCase):
         )
         
         # Check that the result is True
-        self.assertTrue(result)
-        
-        # Test webhook already exists
-        mock_hook = MagicMock()
-        mock_hook.config = {'url': 'https://example.com/webhook'}
-        self.mock_repo.get_hooks.return_value = [mock_hook]
+        assert result
+
+    def test_set_webhook_existing(self, github_manager, mock_repo):
+        """Test that an existing webhook for the same URL is reused."""
+        # Mock a hook that already points at the URL
+        mock_hook = SimpleNamespace(config={'url': 'https://example.com/webhook'})
+        mock_repo.get_hooks.return_value = [mock_hook]
         
-        result = self.github_manager.set_webhook('https://example.com/webhook')
+        result = github_manager.set_webhook('https://example.com/webhook')
         
         # Should not create a new hook
-        self.assertEqual(self.mock_repo.create_hook.call_count, 1)
+        mock_repo.create_hook.assert_not_called()
         
         # Check that the result is True
-        self.assertTrue(result)
-        
-        # Test error handling
-        self.mock_repo.get_hooks.side_effect = Exception("API error")
-        result = self.github_manager.set_webhook('https://error.com/webhook')
-        self.assertFalse(result)
+        assert result
+
+    def test_set_webhook_api_error(self, github_manager, mock_repo):
+        """Test that setting a webhook reports failure when the API raises."""
+        mock_repo.get_hooks.side_effect = Exception("API error")
+        result = github_manager.set_webhook('https://error.com/webhook')
+        assert not result
 
 
 class TestNgrokManager(unittest.TestCase):
     """Test cases for the NgrokManager class."""
 
+    # Configuration values read by NgrokManager
+    CONFIG_VALUES = {
+        'ngrok_token': 'mock_ngrok_token',
+        'webhook_port': 5000,
+        'webhook_path': '/webhook',
+        'webhook_url': '',
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """Patch the ngrok and conf modules once for all tests."""
+        cls.ngrok_patcher = patch('code_agent.core.workflow.ngrok', new_callable=Mock)
+        cls.mock_ngrok = cls.ngrok_patcher.start()
+        cls.conf_patcher = patch('code_agent.core.workflow.conf', new_callable=Mock)
+        cls.mock_conf = cls.conf_patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the ngrok and conf patches after all tests."""
+        cls.ngrok_patcher.stop()
+        cls.conf_patcher.stop()
+
     def setUp(self):
         """Set up test environment before each test."""
-        # Create a mock configuration
-        self.config = MagicMock()
-        self.config.ngrok_token = 'mock_ngrok_token'
-        self.config.webhook_port = 5000
-        self.config.webhook_path = '/webhook'
-        
-        # Patch the ngrok module
-        self.ngrok_patcher = patch('code_agent.core.workflow.ngrok')
-        self.mock_ngrok = self.ngrok_patcher.start()
-        
-        # Patch the conf module
-        self.conf_patcher = patch('code_agent.core.workflow.conf')
-        self.mock_conf = self.conf_patcher.start()
-        self.mock_default_conf = MagicMock()
-        self.mock_conf.get_default.return_value = self.mock_default_conf
+        # Create a configuration holding only the values the manager reads
+        self.config = SimpleNamespace(**self.CONFIG_VALUES)
+        
+        # Start from fresh ngrok and conf mocks
+        self.mock_ngrok.reset_mock(return_value=True, side_effect=True)
+        self.mock_conf.reset_mock(return_value=True, side_effect=True)
+        self.mock_default_conf = self.mock_conf.get_default.return_value
         
         # Create the NgrokManager instance
         self.ngrok_manager = NgrokManager(self.config)
 
-    def tearDown(self):
-        """Clean up after each test."""
-        self.ngrok_patcher.stop()
-        self.conf_patcher.stop()
-
     def test_initialization(self):
         """Test that the NgrokManager initializes correctly."""
         # Check that the config was set
@@ -451,7 +478,7 @@ class TestNgrokManager(unittest.TestCase):
     def test_start_tunnel(self):
         """Test starting an ngrok tunnel."""
         # Mock the connect method
-        mock_tunnel = MagicMock()
+        mock_tunnel = Mock()
         mock_tunnel.public_url = 'https://example.ngrok.io'
         self.mock_ngrok.connect.return_value = mock_tunnel
         
@@ -471,14 +498,15 @@ class TestNgrokManager(unittest.TestCase):
         self.assertEqual(url, 'https://example.ngrok.io/webhook')
         
         # Test error handling
-        self.mock_ngrok.connect.side_effect = Exception("ngrok error")
-        url = self.ngrok_manager.start_tunnel()
-        self.assertEqual(url, "")
+        with self.subTest(path='error'):
+            self.mock_ngrok.connect.side_effect = Exception("ngrok error")
+            url = self.ngrok_manager.start_tunnel()
+            self.assertEqual(url, "")
 
     def test_stop_tunnel(self):
         """Test stopping the ngrok tunnel."""
         # Set a mock tunnel
-        mock_tunnel = MagicMock()
+        mock_tunnel = Mock()
         self.ngrok_manager.tunnel = mock_tunnel
         
         # Stop tunnel
@@ -505,12 +533,16 @@ class TestNgrokManager(unittest.TestCase):
 class TestCodeGenManager(unittest.TestCase):
     """Test cases for the CodeGenManager class."""
 
+    # Configuration values read by CodeGenManager
+    CONFIG_VALUES = {
+        'codegen_token': 'mock_codegen_token',
+        'codegen_org_id': 'mock_codegen_org_id',
+    }
+
     def setUp(self):
         """Set up test environment before each test."""
-        # Create a mock configuration
-        self.config = MagicMock()
-        self.config.codegen_token = 'mock_codegen_token'
-        self.config.codegen_org_id = 'mock_codegen_org_id'
+        # Create a configuration holding only the values the manager reads
+        self.config = SimpleNamespace(**self.CONFIG_VALUES)
 
     def test_initialization(self, mock_agent_class):
         """Test that the CodeGenManager initializes correctly."""
@@ -530,48 +562,54 @@ class TestCodeGenManager(unittest.TestCase):
 class TestWorkflowManager(unittest.TestCase):
     """Test cases for the WorkflowManager class."""
 
+    # Configuration values read by WorkflowManager itself; its managers are mocked
+    CONFIG_VALUES = {
+        'repo_name': 'mock/repo',
+        'test_branch_prefix': 'test-',
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        """Patch the manager classes once for all tests."""
+        cls.managers_patcher = patch.multiple(
+            'code_agent.core.workflow',
+            GitHubManager=DEFAULT,
+            NgrokManager=DEFAULT,
+            CodeGenManager=DEFAULT,
+            DeploymentManager=DEFAULT,
+            WebhookServer=DEFAULT
+        )
+        cls.mock_managers = cls.managers_patcher.start()
+        cls.mock_github_manager = cls.mock_managers['GitHubManager']
+        cls.mock_ngrok_manager = cls.mock_managers['NgrokManager']
+        cls.mock_codegen_manager = cls.mock_managers['CodeGenManager']
+        cls.mock_deployment_manager = cls.mock_managers['DeploymentManager']
+        cls.mock_webhook_server = cls.mock_managers['WebhookServer']
+
+    @classmethod
+    def tearDownClass(cls):
+        """Remove the manager patches after all tests."""
+        cls.managers_patcher.stop()
+
     def setUp(self):
         """Set up test environment before each test."""
-        # Create a mock configuration
-        self.config = MagicMock()
-        
-        # Patch the manager classes
-        self.github_patcher = patch('code_agent.core.workflow.GitHubManager')
-        self.ngrok_patcher = patch('code_agent.core.workflow.NgrokManager')
-        self.codegen_patcher = patch('code_agent.core.workflow.CodeGenManager')
-        self.deployment_patcher = patch('code_agent.core.workflow.DeploymentManager')
-        self.webhook_patcher = patch('code_agent.core.workflow.WebhookServer')
-        
-        self.mock_github_manager = self.github_patcher.start()
-        self.mock_ngrok_manager = self.ngrok_patcher.start()
-        self.mock_codegen_manager = self.codegen_patcher.start()
-        self.mock_deployment_manager = self.deployment_patcher.start()
-        self.mock_webhook_server = self.webhook_patcher.start()
-        
-        # Create instances of the mocked managers
-        self.mock_github_instance = MagicMock()
-        self.mock_ngrok_instance = MagicMock()
-        self.mock_codegen_instance = MagicMock()
-        self.mock_deployment_instance = MagicMock()
-        self.mock_webhook_instance = MagicMock()
-        
-        self.mock_github_manager.return_value = self.mock_github_instance
-        self.mock_ngrok_manager.return_value = self.mock_ngrok_instance
-        self.mock_codegen_manager.return_value = self.mock_codegen_instance
-        self.mock_deployment_manager.return_value = self.mock_deployment_instance
-        self.mock_webhook_server.return_value = self.mock_webhook_instance
+        # Start from fresh manager mocks
+        for mock_class in self.mock_managers.values():
+            mock_class.reset_mock(return_value=True, side_effect=True)
+        
+        # The instances of the mocked managers are their return values
+        self.mock_github_instance = self.mock_github_manager.return_value
+        self.mock_ngrok_instance = self.mock_ngrok_manager.return_value
+        self.mock_codegen_instance = self.mock_codegen_manager.return_value
+        self.mock_deployment_instance = self.mock_deployment_manager.return_value
+        self.mock_webhook_instance = self.mock_webhook_server.return_value
+        
+        # Create a configuration holding only the values the workflow reads
+        self.config = SimpleNamespace(**self.CONFIG_VALUES)
         
         # Create the WorkflowManager instance
         self.workflow_manager = WorkflowManager(self.config)
 
-    def tearDown(self):
-        """Clean up after each test."""
-        self.github_patcher.stop()
-        self.ngrok_patcher.stop()
-        self.codegen_patcher.stop()
-        self.deployment_patcher.stop()
-        self.webhook_patcher.stop()
-
     def test_initialization(self):
         """Test that the WorkflowManager initializes correctly."""
         # Check that the managers were created
@@ -617,19 +655,19 @@ class TestWorkflowManager(unittest.TestCase):
         
         # Check that the result is True
         self.assertTrue(result)
-        
-        # Test error handling for tunnel start
-        self.mock_ngrok_instance.start_tunnel.return_value = ""
-        result = self.workflow_manager.start()
-        self.assertFalse(result)
-        
-        # Reset for next test
-        self.mock_ngrok_instance.start_tunnel.return_value = 'https://example.ngrok.io/webhook'
-        
-        # Test error handling for webhook set
-        self.mock_github_instance.set_webhook.return_value = False
-        result = self.workflow_manager.start()
-        self.assertFalse(result)
+
+    def test_start_failure(self):
+        """Test that starting the workflow fails when the tunnel or the webhook cannot be set up."""
+        # (case, tunnel URL, whether the webhook is set)
+        cases = [
+            ("tunnel", "", True),
+            ("webhook", 'https://example.ngrok.io/webhook', False),
+        ]
+        for case, tunnel_url, webhook_set in cases:
+            with self.subTest(case=case):
+                self.mock_ngrok_instance.start_tunnel.return_value = tunnel_url
+                self.mock_github_instance.set_webhook.return_value = webhook_set
+                self.assertFalse(self.workflow_manager.start())
 
     def test_stop(self):
         """Test stopping the workflow."""
@@ -656,8 +694,3 @@ class TestWorkflowManager(unittest.TestCase):
         
         # But the tunnel should still be stopped
         self.assertEqual(self.mock_ngrok_instance.stop_tunnel.call_count, 2)
-
-
-if __name__ == '__main__':
-    unittest.main()
-